@@ -0,0 +1,65 @@
+"""Initial schema, as previously created by ``Base.metadata.create_all``.
+
+Databases created that way can adopt migrations with
+``alembic stamp 0001_initial_schema`` before ``alembic upgrade head``.
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+subscription_plan = sa.Enum("FREE", "PREMIUM", name="subscriptionplan")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("subscription_plan", subscription_plan, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "birth_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("birth_date", sa.Date(), nullable=False),
+        sa.Column("timezone", sa.String(64), nullable=True),
+        sa.Column("preferred_deck", sa.String(32), nullable=True),
+        sa.UniqueConstraint("user_id", name="uq_birth_profile_user"),
+    )
+
+    op.create_table(
+        "email_preferences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("daily_digest_enabled", sa.Boolean(), nullable=False),
+        sa.Column("cycle_digest_enabled", sa.Boolean(), nullable=False),
+        sa.Column("last_daily_sent", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_cycle_sent", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("email_preferences")
+    op.drop_table("birth_profiles")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
+    bind = op.get_bind()
+    subscription_plan.drop(bind, checkfirst=True)
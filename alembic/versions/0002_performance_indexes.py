@@ -0,0 +1,41 @@
+"""Performance indexes and the ``birth_profiles.birth_ordinal`` column.
+
+``birth_profiles.user_id`` is already covered by ``uq_birth_profile_user``,
+so only ``email_preferences.user_id`` gets a plain index.
+
+Revision ID: 0002_performance_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002_performance_indexes"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("birth_profiles", sa.Column("birth_ordinal", sa.SmallInteger(), nullable=True))
+    if op.get_bind().dialect.name == "sqlite":
+        day_of_year = "CAST(strftime('%j', birth_date) AS INTEGER)"
+    else:
+        day_of_year = "CAST(EXTRACT(DOY FROM birth_date) AS SMALLINT)"
+    op.execute(f"UPDATE birth_profiles SET birth_ordinal = {day_of_year}")
+    with op.batch_alter_table("birth_profiles") as batch:
+        batch.alter_column("birth_ordinal", existing_type=sa.SmallInteger(), nullable=False)
+
+    op.create_index("ix_birth_profiles_ordinal_user", "birth_profiles", ["birth_ordinal", "user_id"])
+    op.create_index("ix_email_preferences_user_id", "email_preferences", ["user_id"])
+    op.create_index("ix_users_plan_id", "users", ["subscription_plan", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_plan_id", table_name="users")
+    op.drop_index("ix_email_preferences_user_id", table_name="email_preferences")
+    op.drop_index("ix_birth_profiles_ordinal_user", table_name="birth_profiles")
+    with op.batch_alter_table("birth_profiles") as batch:
+        batch.drop_column("birth_ordinal")
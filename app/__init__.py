@@ -1,5 +1,19 @@
+from typing import Any
 
+from .utils.compat import ensure_forwardref_recursive_guard_default
 
-from .main import app
+# Before any submodule imports pydantic; alembic and the benchmarks import
+# app.* without going through app.main.
+ensure_forwardref_recursive_guard_default()
 
 __all__ = ["app"]
+
+
+def __getattr__(name: str) -> Any:
+    # Importing a submodule such as ``app.utils.compat`` must not build the
+    # whole application.
+    if name == "app":
+        from .main import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,193 @@
+"""Fingerprinted, precompressed static assets.
+
+``python -m app.core.assets`` copies ``app/static`` into ``app/static_build``.
+Every file is written under its original name and under a content-hashed
+name (``css/main.css`` -> ``css/main.1a2b3c4d5e6f.css``), next to ``.gz`` and,
+when the optional ``brotli`` package is installed, ``.br`` variants.
+``manifest.json`` maps original names to hashed ones for :func:`static_url`.
+
+:class:`PrecompressedStaticFiles` serves the build directory. It picks a
+precompressed variant from ``Accept-Encoding`` and marks hashed names as
+immutable. The build is only used while its hashes still match the files in
+``app/static``; without a build, or with a stale one, ``app/static`` is
+served as before.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+SOURCE_DIR = Path("app/static")
+BUILD_DIR = Path("app/static_build")
+MANIFEST = "manifest.json"
+STATIC_PREFIX = "/static/"
+EMPTY_MANIFEST = {"assets": {}, "encodings": {}}
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".html", ".xml"}
+# Preferred first when the client accepts both.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Unhashed names may change with any deploy.
+REVALIDATE = "no-cache"
+
+
+def fingerprint(relative: Path, data: bytes) -> Path:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return relative.with_name(f"{relative.stem}.{digest}{relative.suffix}")
+
+
+def _compressed_variants(data: bytes) -> dict[str, bytes]:
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        variants[".br"] = brotli.compress(data, quality=11)
+    # A variant that does not save bytes only costs a stat per request.
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def build(source: Path = SOURCE_DIR, output: Path = BUILD_DIR) -> dict:
+    """Rebuild ``output`` from ``source`` and return the manifest."""
+    if output.exists():
+        shutil.rmtree(output)
+    assets: dict[str, str] = {}
+    encodings: dict[str, list[str]] = {}
+    for path in sorted(source.rglob("*")):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(source)
+        data = path.read_bytes()
+        hashed = fingerprint(relative, data)
+        assets[relative.as_posix()] = hashed.as_posix()
+        variants = _compressed_variants(data) if path.suffix in COMPRESSIBLE_SUFFIXES else {}
+        for name in (relative, hashed):
+            target = output / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            for suffix, body in variants.items():
+                target.with_name(target.name + suffix).write_bytes(body)
+            encodings[name.as_posix()] = [
+                encoding for encoding, suffix in ENCODINGS if suffix in variants
+            ]
+    manifest = {"assets": assets, "encodings": encodings}
+    (output / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+
+def is_current(manifest: dict, source: Path = SOURCE_DIR) -> bool:
+    """Whether ``manifest`` was built from the files now in ``source``."""
+    assets = manifest["assets"]
+    seen = 0
+    for path in source.rglob("*"):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(source)
+        if assets.get(relative.as_posix()) != fingerprint(relative, path.read_bytes()).as_posix():
+            return False
+        seen += 1
+    return seen == len(assets)
+
+
+# No defaults: every caller passes both paths, so they share one cache entry
+# and the sources are hashed once per process.
+@lru_cache(maxsize=None)
+def load_manifest(output: Path, source: Path) -> dict:
+    """Manifest of the build in ``output``; empty when missing or stale."""
+    try:
+        manifest = json.loads((output / MANIFEST).read_text())
+    except FileNotFoundError:
+        return EMPTY_MANIFEST
+    if not is_current(manifest, source):
+        logger.warning("%s is older than %s; serving the sources. Rerun python -m app.core.assets.", output, source)
+        return EMPTY_MANIFEST
+    return manifest
+
+
+def static_url(path: str) -> str:
+    """URL of ``path`` (relative to ``app/static``), fingerprinted when built."""
+    return STATIC_PREFIX + load_manifest(BUILD_DIR, SOURCE_DIR)["assets"].get(path, path)
+
+
+def _accepted_encodings(headers: Headers) -> set[str]:
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Serve build output with precompressed variants and long-lived caching."""
+
+    def __init__(self, output: Path = BUILD_DIR, fallback: Path = SOURCE_DIR) -> None:
+        self.manifest = load_manifest(output, fallback)
+        built = bool(self.manifest["assets"])
+        self.immutable = set(self.manifest["assets"].values())
+        super().__init__(directory=output if built else fallback)
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        relative = Path(os.path.relpath(full_path, self.directory)).as_posix()
+        available = self.manifest["encodings"].get(relative, ())
+
+        response: Optional[FileResponse] = None
+        if available:
+            accepted = _accepted_encodings(request_headers)
+            for encoding, suffix in ENCODINGS:
+                if encoding in available and encoding in accepted:
+                    variant = f"{full_path}{suffix}"
+                    response = FileResponse(
+                        variant,
+                        status_code=status_code,
+                        stat_result=os.stat(variant),
+                        # The type of the original file, not of ``.gz``/``.br``.
+                        media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                    )
+                    response.headers["Content-Encoding"] = encoding
+                    break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if available:
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE if relative in self.immutable else REVALIDATE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    manifest = build()
+    load_manifest.cache_clear()
+    print(f"Built {len(manifest['assets'])} assets into {BUILD_DIR}")
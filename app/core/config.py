@@ -10,11 +10,34 @@ class Settings(BaseSettings):
     secret_key: str = Field("CHANGE_ME_SUPER_SECRET", env="SECRET_KEY")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
+    token_cache_size: int = Field(10_000, env="TOKEN_CACHE_SIZE")
+    token_cache_ttl_seconds: float = Field(300.0, env="TOKEN_CACHE_TTL_SECONDS")
+    # Embed the (immutable) birth date in access tokens so birthday-only
+    # insight endpoints skip the user lookup.
+    token_profile_claims: bool = Field(False, env="TOKEN_PROFILE_CLAIMS")
+
+    password_hash_workers: int = Field(4, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_queue: int = Field(64, env="PASSWORD_HASH_MAX_QUEUE")
+    password_hash_queue_timeout: float = Field(5.0, env="PASSWORD_HASH_QUEUE_TIMEOUT")
 
     database_url: str = Field(
         default="sqlite+aiosqlite:///./card_science.db",
         env="DATABASE_URL",
     )
+    database_replica_urls: list[str] = Field(default_factory=list, env="DATABASE_REPLICA_URLS")
+    database_replica_strategy: str = Field("round_robin", env="DATABASE_REPLICA_STRATEGY")
+    # Schema changes go through ``alembic upgrade head``; this only helps
+    # throwaway databases such as in-memory SQLite.
+    db_create_all: bool = Field(False, env="DB_CREATE_ALL")
+    db_echo: bool = Field(False, env="DB_ECHO")
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(1024, env="DB_STATEMENT_CACHE_SIZE")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_size: int = Field(256 * 1024 * 1024, env="SQLITE_MMAP_SIZE")
 
     mail_sender: EmailStr = Field("no-reply@cardsci.app", env="MAIL_SENDER")
     mail_from_name: str = "Card Science Insight"
@@ -23,6 +46,33 @@ class Settings(BaseSettings):
     mail_username: Optional[str] = Field(None, env="MAIL_USERNAME")
     mail_password: Optional[str] = Field(None, env="MAIL_PASSWORD")
     mail_use_tls: bool = Field(True, env="MAIL_USE_TLS")
+    mail_pool_size: int = Field(8, env="MAIL_POOL_SIZE")
+    mail_connection_max_messages: int = Field(500, env="MAIL_CONNECTION_MAX_MESSAGES")
+
+    outbox_worker_in_process: bool = Field(False, env="OUTBOX_WORKER_IN_PROCESS")
+    outbox_batch_size: int = Field(100, env="OUTBOX_BATCH_SIZE")
+    outbox_max_in_flight: int = Field(16, env="OUTBOX_MAX_IN_FLIGHT")
+    outbox_max_attempts: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_backoff_base_seconds: float = Field(30.0, env="OUTBOX_BACKOFF_BASE_SECONDS")
+    outbox_backoff_max_seconds: float = Field(3600.0, env="OUTBOX_BACKOFF_MAX_SECONDS")
+    outbox_lease_seconds: float = Field(300.0, env="OUTBOX_LEASE_SECONDS")
+    outbox_poll_interval_seconds: float = Field(2.0, env="OUTBOX_POLL_INTERVAL_SECONDS")
+    outbox_domain_rate_per_second: float = Field(10.0, env="OUTBOX_DOMAIN_RATE_PER_SECOND")
+
+    digest_chunk_size: int = Field(1000, env="DIGEST_CHUNK_SIZE")
+
+    user_cache_size: int = Field(10_000, env="USER_CACHE_SIZE")
+    user_cache_ttl_seconds: float = Field(60.0, env="USER_CACHE_TTL_SECONDS")
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+
+    forecast_cache_size: int = Field(10_000, env="FORECAST_CACHE_SIZE")
+    # Directory shared by the workers of one host; unset keeps entries per process.
+    forecast_cache_dir: Optional[str] = Field(None, env="FORECAST_CACHE_DIR")
+    # Compiled Jinja templates; unset uses a per-user directory under the system temp dir.
+    template_cache_dir: Optional[str] = Field(None, env="TEMPLATE_CACHE_DIR")
+
+    admin_emails: list[EmailStr] = Field(default_factory=list, env="ADMIN_EMAILS")
+    service_api_key: Optional[str] = Field(None, env="SERVICE_API_KEY")
 
     railway_port: int = Field(8000, env="PORT")
 
@@ -0,0 +1,283 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Every worker process keeps its own values; scrape each worker (or sum them
+in Prometheus) when running several. Like the other hot-path helpers these
+are meant to be updated from the event loop and are not locked. With
+``METRICS_ENABLED=false`` :func:`timed` and the SQL timing hooks are not
+installed at all.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._labels(key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Per label set: non-cumulative bucket counts (+Inf last), sum.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = entry
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = self._labels(key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {total[0]}"
+            yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+
+class StatsGauge(_Metric):
+    """Gauges read at scrape time from existing ``stats()`` dictionaries.
+
+    ``collect`` returns ``(labels, stats)`` pairs; every stats key becomes a
+    sample labelled ``stat="<key>"``.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[tuple[dict[str, str], Mapping[str, float]]]],
+    ) -> None:
+        super().__init__(name, documentation)
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for labels, stats in self.collect():
+            for stat, value in stats.items():
+                pairs = [f'{key}="{_escape(str(item))}"' for key, item in labels.items()]
+                pairs.append(f'stat="{_escape(stat)}"')
+                yield f"{self.name}{{{','.join(pairs)}}} {float(value)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry: list[_Metric] = []
+enabled = get_settings().metrics_enabled
+
+
+def render() -> bytes:
+    return ("\n".join(line for metric in registry for line in metric.render()) + "\n").encode()
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template.",
+    ("method", "route", "status"),
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "Requests currently being handled.", ("method",)
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements.", ("engine",)
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per request.", ("route",), COUNT_BUCKETS
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds", "Total SQL time spent per request.", ("route",)
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "bcrypt work time on the hash pool.", ("operation",)
+)
+card_science_duration = Histogram(
+    "card_science_duration_seconds",
+    "Time spent in card_science batch entry points (inclusive of nested calls).",
+    ("function",),
+    FAST_BUCKETS,
+)
+email_send_total = Counter(
+    "email_send_total", "Email delivery attempts by outcome.", ("outcome",)
+)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_query(engine_name: str, seconds: float) -> None:
+    db_query_duration.observe(seconds, engine=engine_name)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += seconds
+
+
+def timed(histogram: Histogram, **labels: str) -> Callable[[F], F]:
+    """Decorate a synchronous function so every call is observed in ``histogram``.
+
+    Returns functions unchanged when metrics are disabled.
+    """
+
+    def decorator(func: F) -> F:
+        if not enabled:
+            return func
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, **labels)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """Record latency, in-flight requests and SQL usage per route template.
+
+    Requests that match no route are reported as ``route="other"`` so that
+    arbitrary paths cannot blow up the label cardinality.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method=method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            http_requests_in_progress.dec(method=method)
+            _request_stats.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", "other")
+            http_request_duration.observe(
+                elapsed, method=method, route=template, status=str(status_code)
+            )
+            db_queries_per_request.observe(stats.queries, route=template)
+            db_time_per_request.observe(stats.query_seconds, route=template)
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsMiddleware",
+    "RequestStats",
+    "StatsGauge",
+    "card_science_duration",
+    "email_send_total",
+    "password_hash_duration",
+    "record_query",
+    "registry",
+    "render",
+    "timed",
+]
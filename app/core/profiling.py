@@ -0,0 +1,188 @@
+"""On-demand profiling of a live worker.
+
+At most one :class:`ProfileSession` runs per process. While none is active
+:class:`ProfilerMiddleware` only performs a single attribute check per request.
+
+Two modes are supported:
+
+``sampling``
+    A background thread samples the event loop thread's stack every
+    ``interval`` seconds and aggregates collapsed stacks (``a;b;c count``, as
+    consumed by ``flamegraph.pl`` and speedscope). Each stack is prefixed
+    with the route template of the request it belongs to, or ``idle``.
+``cprofile``
+    :mod:`cProfile` is enabled on the event loop thread. It records every
+    call made there, including requests that overlap the profiled ones, and
+    cannot attribute calls to routes.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+MODES = ("sampling", "cprofile")
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class ProfileSession:
+    def __init__(self, mode: str, max_requests: Optional[int], interval: float) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.max_requests = max_requests
+        self.interval = interval
+        self.requests = 0
+        self.samples = 0
+        self.started_at = time.monotonic()
+        self.stopped_at: Optional[float] = None
+        self.finished = asyncio.Event()
+        self.stacks: Counter[str] = Counter()
+        # Frame of ``ProfilerMiddleware.__call__`` -> ASGI scope of its request.
+        self.active: dict[FrameType, Scope] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._stop_sampling = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.stopped_at or time.monotonic()) - self.started_at
+
+    def start(self) -> None:
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            return
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), name="profiler-sampler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop collecting without blocking; see :meth:`join`."""
+        self.stopped_at = time.monotonic()
+        if self._profile is not None:
+            self._profile.disable()
+        self._stop_sampling.set()
+        self.finished.set()
+
+    async def join(self) -> None:
+        """Wait, off the event loop, until the sampler thread has exited.
+
+        Call before reading the output of a sampling session.
+        """
+        if self._sampler is not None:
+            await asyncio.to_thread(self._sampler.join)
+
+    def request_finished(self) -> None:
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            profiler.stop()
+
+    def collapsed(self) -> bytes:
+        lines = (f"{stack} {count}" for stack, count in self.stacks.most_common())
+        return ("\n".join(lines) + "\n").encode()
+
+    def pstats_text(self) -> bytes:
+        output = io.StringIO()
+        stats = pstats.Stats(self._require_profile(), stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(100)
+        return output.getvalue().encode()
+
+    def pstats_dump(self) -> bytes:
+        """Binary dump as written by :meth:`pstats.Stats.dump_stats`."""
+        profile = self._require_profile()
+        profile.create_stats()
+        return marshal.dumps(profile.stats)
+
+    def _require_profile(self) -> cProfile.Profile:
+        if self._profile is None:
+            raise ValueError("pstats output requires the cprofile mode")
+        return self._profile
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stop_sampling.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            route = "idle"
+            names: list[str] = []
+            while frame is not None:
+                scope = self.active.get(frame)
+                if scope is not None and route == "idle":
+                    route = getattr(scope.get("route"), "path", scope.get("path", "other"))
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            names.append(route)
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Owns the current :class:`ProfileSession` of this process."""
+
+    def __init__(self) -> None:
+        self.session: Optional[ProfileSession] = None
+
+    def start(
+        self, mode: str = "sampling", max_requests: Optional[int] = None, interval: float = 0.005
+    ) -> ProfileSession:
+        if self.session is not None:
+            raise ProfilerBusy("A profiling session is already running")
+        session = ProfileSession(mode, max_requests, interval)
+        session.start()
+        self.session = session
+        return session
+
+    def stop(self) -> Optional[ProfileSession]:
+        session, self.session = self.session, None
+        if session is not None:
+            session.stop()
+        return session
+
+
+profiler = Profiler()
+
+
+class ProfilerMiddleware:
+    """Tag sampled stacks with their request and count finished requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session = profiler.session
+        if session is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()
+        session.active[frame] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.active.pop(frame, None)
+            if profiler.session is session:
+                session.request_finished()
+
+
+__all__ = ["MODES", "ProfileSession", "Profiler", "ProfilerBusy", "ProfilerMiddleware", "profiler"]
@@ -1,15 +1,25 @@
-from datetime import datetime, timedelta
-from typing import Any, Optional
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
 
 import jwt
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
 
+from .cache import TTLCache
 from .config import get_settings
+from .metrics import StatsGauge, password_hash_duration
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
 
+T = TypeVar("T")
+
 
 class TokenError(HTTPException):
     def __init__(self) -> None:
@@ -20,12 +30,150 @@ class TokenError(HTTPException):
         )
 
 
+class PasswordHasherBusy(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+
+
+class PasswordHashPool:
+    """Run bcrypt work on a bounded thread pool off the event loop.
+
+    bcrypt releases the GIL, so threads give real parallelism. At most
+    ``max_workers`` calls run at once and at most ``max_queue`` wait for a
+    slot; further callers, or callers that wait longer than
+    ``queue_timeout`` seconds, are rejected with :class:`PasswordHasherBusy`.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        queued_at = time.perf_counter()
+        if self._slots.locked():
+            if self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.queue_depth += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise PasswordHasherBusy() from None
+            finally:
+                self.queue_depth -= 1
+        else:
+            await self._slots.acquire()
+
+        started_at = time.perf_counter()
+        self.wait_seconds_total += started_at - queued_at
+        self.in_flight += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        except BaseException:
+            self.in_flight -= 1
+            self._slots.release()
+            raise
+
+        def finished(future: "asyncio.Future[T]") -> None:
+            # Runs when the thread is done, even if the caller was cancelled
+            # meanwhile, so a slot is only freed once bcrypt really stopped.
+            elapsed = time.perf_counter() - started_at
+            self.in_flight -= 1
+            self.completed += 1
+            self.hash_seconds_total += elapsed
+            self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+            password_hash_duration.observe(elapsed, operation=func.__name__)
+            self._slots.release()
+            if not future.cancelled():
+                future.exception()  # retrieved, so an abandoned failure is not logged
+
+        future.add_done_callback(finished)
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_seconds_total": self.hash_seconds_total,
+            "hash_seconds_max": self.hash_seconds_max,
+            "wait_seconds_total": self.wait_seconds_total,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+    queue_timeout=settings.password_hash_queue_timeout,
+)
+StatsGauge(
+    "password_hash_pool", "Password hash pool state.", lambda: [({}, password_hash_pool.stats())]
+)
+
+
+@lru_cache(maxsize=None)
+def pwd_context() -> "CryptContext":
+    # passlib and bcrypt are only needed once someone logs in or registers.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+# Verified payloads keyed by the SHA-256 digest of the raw token. Entries
+# never outlive the token's own ``exp`` claim.
+token_cache: TTLCache[bytes, dict[str, Any]] = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds
+)
+StatsGauge("token_cache", "Verified token cache counters.", lambda: [({}, token_cache.stats())])
+
+# Claim names of the compact token format. Only values that cannot change
+# during a token's lifetime belong here; plan and timezone are mutable.
+BIRTH_DATE_CLAIM = "bd"
+
+
+def profile_claims(birth_date: date) -> dict[str, Any]:
+    """Claims that let birthday-only endpoints answer without loading the user."""
+    return {BIRTH_DATE_CLAIM: birth_date.isoformat()}
 
 
 def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -39,8 +187,22 @@ def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta]
 
 
 def decode_token(token: str) -> dict[str, Any]:
+    """Decode and verify ``token``, reusing earlier verifications.
+
+    The returned payload may be shared between requests and must not be
+    mutated.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except jwt.PyJWTError as exc:  # pragma: no cover - defensive
         raise TokenError() from exc
+
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        token_cache.set(digest, payload, ttl=expires_at - time.time())
     return payload
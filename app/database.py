@@ -1,20 +1,287 @@
-from typing import AsyncGenerator
+import itertools
+import time
+from typing import Any, AsyncGenerator, Sequence
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from fastapi import Depends, Request
+from sqlalchemy import event, exc, inspect, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
-from .core.config import get_settings
+from .core.config import Settings, get_settings
+from .core.metrics import StatsGauge, record_query
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_wait(time.perf_counter() - started_at)
+        return connection
+
+
+def database_url(raw_url: str) -> URL:
+    """Parse ``raw_url``, defaulting bare Postgres URLs to the asyncpg driver."""
+    url = make_url(raw_url)
+    if url.drivername in ("postgres", "postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+def build_engine(raw_url: str, settings: Settings, name: str = "primary") -> AsyncEngine:
+    url = database_url(raw_url)
+    options: dict[str, Any] = {"echo": settings.db_echo, "future": True}
+    connect_args: dict[str, Any] = {}
+    backend = url.get_backend_name()
+    in_memory = backend == "sqlite" and url.database in (None, "", ":memory:")
+
+    if in_memory:
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            poolclass=type("InstrumentedAsyncPool", (InstrumentedAsyncPool,), {"metrics": PoolMetrics()}),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+
+    if backend == "sqlite":
+        # Python-level lock wait, in addition to the busy_timeout pragma below.
+        connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    elif url.get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+
+    new_engine = create_async_engine(url, connect_args=connect_args, **options)
+
+    if backend == "sqlite":
+        _configure_sqlite(new_engine, settings, in_memory)
+    if settings.metrics_enabled:
+        _instrument_queries(new_engine, name)
+    if not in_memory:
+        metrics = new_engine.pool.metrics
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _count_connect(dbapi_connection: Any, connection_record: Any) -> None:
+            metrics.connects += 1
+
+    return new_engine
+
+
+def _instrument_queries(new_engine: AsyncEngine, name: str) -> None:
+    # The start time lives on the per-statement execution context, so a
+    # failed statement simply leaves nothing behind.
+    @event.listens_for(new_engine.sync_engine, "before_cursor_execute", named=True)
+    def _start_timer(context: Any, **kwargs: Any) -> None:
+        context.query_started_at = time.perf_counter()
+
+    @event.listens_for(new_engine.sync_engine, "after_cursor_execute", named=True)
+    def _record(context: Any, **kwargs: Any) -> None:
+        record_query(name, time.perf_counter() - context.query_started_at)
+
+
+def _configure_sqlite(new_engine: AsyncEngine, settings: Settings, in_memory: bool) -> None:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+    ]
+    if not in_memory:
+        # WAL lets readers proceed while a registration is being written.
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def pool_status(target: AsyncEngine) -> dict[str, float]:
+    pool = target.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": metrics.checkouts,
+        "connects": metrics.connects,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_total": metrics.wait_seconds_total,
+        "wait_seconds_max": metrics.wait_seconds_max,
+    }
+
+
+class ReplicaSet:
+    """Read replicas picked round-robin or by fewest checked-out connections."""
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(self, engines: Sequence[AsyncEngine], strategy: str = "round_robin") -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._cycle = itertools.cycle(self.engines)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> AsyncEngine:
+        if self.strategy == "least_connections":
+            return min(self.engines, key=_checked_out)
+        return next(self._cycle)
+
+
+def _checked_out(candidate: AsyncEngine) -> int:
+    checkedout = getattr(candidate.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+class PrimarySession(Session):
+    pass
+
+
+class RoutingSession(Session):
+    """Session bound to a replica until the request commits on the primary.
+
+    ``info["request_state"]`` is the request's ``state``; once the primary
+    session commits, ``db_primary_pinned`` is set and every later statement
+    of the request reads from the primary.
+    """
+
+    @property
+    def primary_pinned(self) -> bool:
+        return getattr(self.info["request_state"], "db_primary_pinned", False)
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        if self.primary_pinned:
+            return engine.sync_engine
+        return self.info["replica"].sync_engine
+
+
 settings = get_settings()
-engine = create_async_engine(settings.database_url, echo=False, future=True)
-async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+engine = build_engine(settings.database_url, settings)
+async_session_factory = async_sessionmaker(
+    engine, sync_session_class=PrimarySession, expire_on_commit=False
+)
+replicas = ReplicaSet(
+    [
+        build_engine(url, settings, name=f"replica{position}")
+        for position, url in enumerate(settings.database_replica_urls)
+    ],
+    settings.database_replica_strategy,
+)
+read_session_factory = async_sessionmaker(sync_session_class=RoutingSession, expire_on_commit=False)
+
+StatsGauge(
+    "db_pool",
+    "Connection pool state per engine.",
+    lambda: [
+        ({"engine": "primary"}, pool_status(engine)),
+        *(
+            ({"engine": f"replica{position}"}, pool_status(replica))
+            for position, replica in enumerate(replicas.engines)
+        ),
+    ],
+)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_primary(session: Session) -> None:
+    request_state = session.info.get("request_state")
+    if request_state is None:
+        return
+    request_state.db_primary_pinned = True
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_factory() as session:
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _refresh_after_pin(orm_execute_state: Any) -> None:
+    # Objects loaded from a replica earlier in the request may predate the
+    # commit; overwrite them with the primary's rows instead of reusing the
+    # identity map.
+    if orm_execute_state.is_select and orm_execute_state.session.primary_pinned:
+        orm_execute_state.update_execution_options(populate_existing=True)
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_factory(info={"request_state": request.state}) as session:
         yield session
+
+
+async def get_read_session(
+    request: Request, primary: AsyncSession = Depends(get_session)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only work, served by a replica when any are configured.
+
+    Without replicas this is the request's primary session. After a commit on
+    the primary session, the remaining reads of the request go to the primary.
+    """
+    if not replicas:
+        yield primary
+        return
+    info = {"request_state": request.state, "replica": replicas.choose()}
+    async with read_session_factory(info=info) as session:
+        yield session
+
+
+def _schema_is_current(connection: Any) -> bool:
+    if not inspect(connection).has_table("alembic_version"):
+        return False
+    # Alembic is only imported on this opt-in path, never for a normal boot.
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory.from_config(Config("alembic.ini")).get_heads())
+    applied = set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    return applied == heads
+
+
+async def ensure_schema() -> None:
+    """Create missing tables when ``DB_CREATE_ALL`` is set.
+
+    Databases already migrated to the current Alembic head are left alone so
+    that a restart does not pay for reflecting every table.
+    """
+    async with engine.begin() as conn:
+        if not await conn.run_sync(_schema_is_current):
+            await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines() -> None:
+    for target in (engine, *replicas.engines):
+        await target.dispose()
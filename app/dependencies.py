@@ -1,31 +1,71 @@
-from typing import Annotated
+import hmac
+from dataclasses import replace
+from datetime import date
+from typing import Annotated, Awaitable, Callable, Optional
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload, raiseload
 
-from .core.security import TokenError, decode_token
-from .database import get_session
+from .core.config import get_settings
+from .core.security import BIRTH_DATE_CLAIM, TokenError, decode_token
+from .database import get_read_session, get_session
 from .models import User
+from .services.user_cache import UserSnapshot, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+service_key_scheme = APIKeyHeader(name="X-Service-Key", auto_error=False)
+settings = get_settings()
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> User:
+UserDependency = Callable[..., Awaitable[User]]
+
+
+def current_user_loader(
+    *relationships: str, session_dependency: Callable = get_session
+) -> UserDependency:
+    """Build a ``get_current_user`` variant that eager loads ``relationships``.
+
+    The user and the requested relationships are fetched with a single joined
+    query. Relationships that were not requested raise on access instead of
+    triggering a lazy load, which async sessions cannot perform. Loaders
+    using :func:`get_read_session` return users that must not be modified.
+    """
+    options = [joinedload(getattr(User, name)) for name in relationships]
+    options.append(raiseload("*"))
+
+    async def dependency(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        session: Annotated[AsyncSession, Depends(session_dependency)],
+    ) -> User:
+        return await _load_current_user(token, session, options)
+
+    return dependency
+
+
+async def _load_current_user(token: str, session: AsyncSession, options: list) -> User:
+    return await _load_user(_token_subject(_decode(token)), session, options)
+
+
+def _decode(token: str) -> dict:
     try:
-        payload = decode_token(token)
+        return decode_token(token)
     except TokenError as exc:  # pragma: no cover
         raise exc
 
+
+def _token_subject(payload: dict) -> str:
     user_id = payload.get("sub")
     if user_id is None:
         raise TokenError()
+    return user_id
+
 
-    result = await session.execute(select(User).where(User.id == int(user_id)))
+async def _load_user(user_id: str, session: AsyncSession, options: list) -> User:
+    result = await session.execute(select(User).where(User.id == int(user_id)).options(*options))
     user = result.scalar_one_or_none()
 
     if user is None:
@@ -34,7 +74,106 @@ async def get_current_user(
     return user
 
 
+get_current_user = current_user_loader(
+    "profile", "email_preferences", session_dependency=get_read_session
+)
+get_current_user_only = current_user_loader()
+get_current_user_with_profile = current_user_loader("profile")
+get_current_user_with_preferences = current_user_loader("email_preferences")
+get_current_user_with_preferences_readonly = current_user_loader(
+    "email_preferences", session_dependency=get_read_session
+)
+
+_snapshot_options = [joinedload(User.profile), raiseload("*")]
+
+
+async def get_cached_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> UserSnapshot:
+    """Resolve the current user as a cached :class:`UserSnapshot`.
+
+    Suitable for read-only handlers; write paths must load the ORM user and
+    invalidate the cache entry after committing.
+    """
+    return await _cached_user(_decode(token), session)
+
+
+async def get_plan_gated_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> UserSnapshot:
+    """Like :func:`get_cached_user`, but with ``subscription_plan`` read fresh.
+
+    ``invalidate_user`` only clears the local process, so another worker may
+    hold a snapshot with the old plan for up to ``USER_CACHE_TTL_SECONDS``.
+    Endpoints that grant or refuse access by plan pay for one primary-key
+    lookup instead of trusting it.
+    """
+    payload = _decode(token)
+    snapshot = await _cached_user(payload, session)
+    plan = await session.scalar(select(User.subscription_plan).where(User.id == snapshot.id))
+    if plan is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if plan != snapshot.subscription_plan:
+        snapshot = replace(snapshot, subscription_plan=plan)
+        user_cache.set(str(snapshot.id), snapshot)
+    return snapshot
+
+
+async def get_insight_birthday(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> Optional[date]:
+    """The caller's birth date, or ``None`` when no profile exists.
+
+    Tokens issued with ``TOKEN_PROFILE_CLAIMS`` enabled carry the birth date,
+    so no cache or database lookup is needed for them. Plan and timezone are
+    never taken from the token because they can change before it expires.
+    """
+    payload = _decode(token)
+    _token_subject(payload)
+    birth_date = payload.get(BIRTH_DATE_CLAIM)
+    if birth_date is not None:
+        return date.fromisoformat(birth_date)
+    profile = (await _cached_user(payload, session)).profile
+    return profile.birth_date if profile else None
+
+
+async def _cached_user(payload: dict, session: AsyncSession) -> UserSnapshot:
+    user_id = _token_subject(payload)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        snapshot = UserSnapshot.from_user(await _load_user(user_id, session, _snapshot_options))
+        user_cache.set(user_id, snapshot)
+    return snapshot
+
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
     return current_user
+
+
+async def get_admin_principal(
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+    service_key: Annotated[Optional[str], Depends(service_key_scheme)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> str:
+    """Authorize an admin user or a service account.
+
+    Service accounts authenticate with the ``X-Service-Key`` header, admins
+    with a regular bearer token whose email is listed in ``ADMIN_EMAILS``.
+    """
+    if service_key is not None:
+        if settings.service_api_key and hmac.compare_digest(service_key, settings.service_api_key):
+            return "service"
+        raise TokenError()
+
+    if token is None:
+        raise TokenError()
+
+    user = await get_current_user_only(token, session)
+    if user.email not in settings.admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
+    return f"user:{user.id}"
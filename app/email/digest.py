@@ -0,0 +1,216 @@
+"""Daily and cycle digest dispatch.
+
+Run once per morning, e.g. ``python -m app.email.digest``. Eligible premium
+users are streamed in keyset-paginated chunks and today-cards and cycle
+transitions are computed for the whole chunk at once. Each chunk's messages
+are written to the outbox and ``last_*_sent`` is updated in the same
+transaction, so a crash never loses or repeats a digest; the
+:class:`~app.email.outbox.OutboxWorker` delivers them with retries.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Collection, Optional, Sequence
+
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from ..core.config import get_settings
+from ..database import async_session_factory, dispose_engines
+from ..models import BirthProfile, EmailPreference, SubscriptionPlan, User
+from ..services.card_science import (
+    batch_cycle_card_indices,
+    batch_cycle_positions,
+    batch_today_card_indices,
+    local_as_of_ordinals,
+)
+from ..utils.timezones import get_zone, utc_now
+from .outbox import QueuedEmail, enqueue_emails
+from .templates import DigestRenderer
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class DigestStats:
+    scanned: int = 0
+    daily_queued: int = 0
+    cycle_queued: int = 0
+    # Already in the outbox from an earlier, interrupted run.
+    duplicates: int = 0
+    templates: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class DigestMessage:
+    user_id: int
+    kind: str
+    as_of: date
+    subject: str
+    recipient: str
+    html_body: str
+
+    def to_email(self) -> QueuedEmail:
+        # One digest of each kind per user and local day.
+        key = f"digest:{self.kind}:{self.user_id}:{self.as_of.isoformat()}"
+        return QueuedEmail(self.recipient, self.subject, self.html_body, idempotency_key=key)
+
+
+class DigestDispatcher:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        chunk_size: int = settings.digest_chunk_size,
+        birth_ordinals: Optional[Collection[int]] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        # Restricts a run to these ``BirthProfile.birth_ordinal`` buckets,
+        # e.g. from ``card_birth_ordinals``, to split work across jobs.
+        self.birth_ordinals = birth_ordinals
+
+    async def run(self, now: Optional[datetime] = None) -> DigestStats:
+        now = now or utc_now()
+        stats = DigestStats()
+        renderer = DigestRenderer()
+        last_id = 0
+        while True:
+            async with self.session_factory() as session:
+                rows = (await session.execute(self._candidates(last_id))).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                stats.scanned += len(rows)
+
+                messages = self._build_messages(rows, now, renderer)
+                emails = [message.to_email() for message in messages]
+                queued = await enqueue_emails(session, emails)
+                await self._mark_sent(session, messages, now)
+                await session.commit()
+
+            kinds = Counter(
+                message.kind for message, email in zip(messages, emails) if email.idempotency_key in queued
+            )
+            stats.daily_queued += kinds["daily"]
+            stats.cycle_queued += kinds["cycle"]
+            stats.duplicates += len(messages) - len(queued)
+        stats.templates = renderer.stats()
+        return stats
+
+    def _candidates(self, last_id: int):
+        query = (
+            select(
+                User.id,
+                User.email,
+                User.full_name,
+                BirthProfile.birth_date,
+                BirthProfile.timezone,
+                EmailPreference.daily_digest_enabled,
+                EmailPreference.cycle_digest_enabled,
+                EmailPreference.last_daily_sent,
+                EmailPreference.last_cycle_sent,
+            )
+            .join(BirthProfile, BirthProfile.user_id == User.id)
+            .join(EmailPreference, EmailPreference.user_id == User.id)
+            .where(
+                User.id > last_id,
+                User.subscription_plan == SubscriptionPlan.PREMIUM,
+                or_(EmailPreference.daily_digest_enabled, EmailPreference.cycle_digest_enabled),
+            )
+            .order_by(User.id)
+            .limit(self.chunk_size)
+        )
+        if self.birth_ordinals is not None:
+            query = query.where(BirthProfile.birth_ordinal.in_(sorted(self.birth_ordinals)))
+        return query
+
+    def _build_messages(
+        self, rows: Sequence[Any], now: datetime, renderer: DigestRenderer
+    ) -> list[DigestMessage]:
+        birthdays = [row.birth_date for row in rows]
+        as_of_ordinals = local_as_of_ordinals([row.timezone for row in rows], now)
+        today_indices, _ = batch_today_card_indices(birthdays, as_of_ordinals)
+        cycle_numbers, days_in_cycle = batch_cycle_positions(birthdays, as_of_ordinals)
+        cycle_cards, _ = batch_cycle_card_indices(birthdays)
+
+        messages: list[DigestMessage] = []
+        for position, row in enumerate(rows):
+            as_of = date.fromordinal(int(as_of_ordinals[position]))
+            name = row.full_name or row.email
+            if row.daily_digest_enabled and _due(row.last_daily_sent, row.timezone, as_of):
+                rendered = renderer.daily(int(today_indices[position]), as_of)
+                messages.append(
+                    DigestMessage(
+                        user_id=row.id,
+                        kind="daily",
+                        as_of=as_of,
+                        subject=rendered.subject,
+                        recipient=row.email,
+                        html_body=rendered.personalize(name),
+                    )
+                )
+
+            cycle_number = int(cycle_numbers[position])
+            starts_cycle = cycle_number > 0 and int(days_in_cycle[position]) == 0
+            if (
+                row.cycle_digest_enabled
+                and starts_cycle
+                and _due(row.last_cycle_sent, row.timezone, as_of)
+            ):
+                rendered = renderer.cycle(
+                    int(cycle_cards[position, cycle_number - 1]), cycle_number, as_of
+                )
+                messages.append(
+                    DigestMessage(
+                        user_id=row.id,
+                        kind="cycle",
+                        as_of=as_of,
+                        subject=rendered.subject,
+                        recipient=row.email,
+                        html_body=rendered.personalize(name),
+                    )
+                )
+        return messages
+
+    async def _mark_sent(
+        self, session: AsyncSession, messages: Sequence[DigestMessage], now: datetime
+    ) -> None:
+        """One UPDATE per kind; the caller commits it with the queued messages."""
+        columns = {"daily": "last_daily_sent", "cycle": "last_cycle_sent"}
+        for kind, column in columns.items():
+            user_ids = [message.user_id for message in messages if message.kind == kind]
+            if user_ids:
+                await session.execute(
+                    update(EmailPreference)
+                    .where(EmailPreference.user_id.in_(user_ids))
+                    .values({column: now})
+                )
+
+
+def _due(last_sent: Optional[datetime], zone_name: Optional[str], as_of: date) -> bool:
+    """Whether nothing was sent yet on the user's local ``as_of`` date."""
+    if last_sent is None:
+        return True
+    if last_sent.tzinfo is None:
+        # SQLite drops the offset; values are always written in UTC.
+        last_sent = last_sent.replace(tzinfo=timezone.utc)
+    return last_sent.astimezone(get_zone(zone_name)).date() < as_of
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        stats = await DigestDispatcher().run()
+    finally:
+        await dispose_engines()
+    logger.info("Digest run finished: %s", stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,292 @@
+"""Durable outbound email queue.
+
+Messages are written to the ``email_outbox`` table by :func:`enqueue_email`
+and delivered by :class:`OutboxWorker`, either inside the web process
+(``OUTBOX_WORKER_IN_PROCESS=true``) or as a separate process via
+``python -m app.email.outbox``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from ..core.config import get_settings
+from ..database import async_session_factory, dispose_engines
+from ..models import OutboundEmail, OutboxStatus
+from .sender import EmailSender, email_sender
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class QueuedEmail:
+    recipient: str
+    subject: str
+    html_body: str
+    text_body: Optional[str] = None
+    idempotency_key: Optional[str] = None
+
+
+async def enqueue_email(
+    session: AsyncSession,
+    recipient: str,
+    subject: str,
+    html_body: str,
+    text_body: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> bool:
+    """Add a message to the outbox; the caller commits.
+
+    Returns ``False`` when a message with the same ``idempotency_key`` was
+    already queued.
+    """
+    email = QueuedEmail(recipient, subject, html_body, text_body, idempotency_key)
+    return bool(await enqueue_emails(session, [email]))
+
+
+async def enqueue_emails(session: AsyncSession, emails: Sequence[QueuedEmail]) -> set[str]:
+    """Add many messages with one lookup of existing keys; the caller commits.
+
+    Returns the idempotency keys that were queued. Messages whose key is
+    already in the outbox, or repeated within ``emails``, are skipped.
+    """
+    keyed = [(email.idempotency_key or uuid.uuid4().hex, email) for email in emails]
+    if not keyed:
+        return set()
+    existing = set(
+        await session.scalars(
+            select(OutboundEmail.idempotency_key).where(
+                OutboundEmail.idempotency_key.in_([key for key, _ in keyed])
+            )
+        )
+    )
+    queued: dict[str, QueuedEmail] = {}
+    for key, email in keyed:
+        if key not in existing:
+            queued.setdefault(key, email)
+    session.add_all(
+        OutboundEmail(
+            idempotency_key=key,
+            recipient=email.recipient,
+            domain=email.recipient.rpartition("@")[2].lower(),
+            subject=email.subject,
+            html_body=email.html_body,
+            text_body=email.text_body,
+        )
+        for key, email in queued.items()
+    )
+    return set(queued)
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain."""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None) -> None:
+        self.rate = rate_per_second
+        self.burst = burst or max(rate_per_second, 1.0)
+        self._buckets: dict[str, tuple[float, float]] = defaultdict(
+            lambda: (self.burst, time.monotonic())
+        )
+
+    async def acquire(self, domain: str) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            tokens, updated_at = self._buckets[domain]
+            now = time.monotonic()
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                self._buckets[domain] = (tokens - 1, now)
+                return
+            self._buckets[domain] = (tokens, now)
+            await asyncio.sleep((1 - tokens) / self.rate)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_factory,
+        sender: EmailSender = email_sender,
+        batch_size: int = settings.outbox_batch_size,
+        max_in_flight: int = settings.outbox_max_in_flight,
+        max_attempts: int = settings.outbox_max_attempts,
+    ) -> None:
+        self.session_factory = session_factory
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._rate_limiter = DomainRateLimiter(settings.outbox_domain_rate_per_second)
+
+    async def run_forever(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:  # noqa: BLE001 - keep draining after transient DB errors
+                logger.exception("Outbox batch failed")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.outbox_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of messages handled."""
+        claim, messages = await self._claim()
+        if not messages:
+            return 0
+        results = await asyncio.gather(*(self._deliver(message) for message in messages))
+        await self._record(claim, messages, results)
+        return len(messages)
+
+    async def _claim(self) -> tuple[str, list[OutboundEmail]]:
+        """Lease due messages to a fresh claim token and return both.
+
+        A ``SENDING`` row whose lease expired belongs to a worker that crashed
+        or hung mid-send, so re-leasing it counts as an attempt; once that
+        exhausts ``max_attempts`` the row is failed instead of claimed.
+        """
+        now = datetime.utcnow()
+        claim = uuid.uuid4().hex
+        async with self.session_factory() as session:
+            due = (
+                select(OutboundEmail.id)
+                .where(
+                    OutboundEmail.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                    OutboundEmail.next_attempt_at <= now,
+                )
+                .order_by(OutboundEmail.next_attempt_at)
+                .limit(self.batch_size)
+            )
+            ids = list((await session.scalars(due)).all())
+            if not ids:
+                return claim, []
+            await session.execute(
+                update(OutboundEmail)
+                .where(OutboundEmail.id.in_(ids), OutboundEmail.next_attempt_at <= now)
+                .where(OutboundEmail.status == OutboxStatus.SENDING)
+                .where(OutboundEmail.attempts + 1 >= self.max_attempts)
+                .values(
+                    status=OutboxStatus.FAILED,
+                    attempts=OutboundEmail.attempts + 1,
+                    last_error="Lease expired during delivery",
+                    claimed_by=None,
+                )
+            )
+            # Re-checking the due condition makes the claim safe against
+            # concurrent workers even without SELECT ... FOR UPDATE.
+            await session.execute(
+                update(OutboundEmail)
+                .where(OutboundEmail.id.in_(ids), OutboundEmail.next_attempt_at <= now)
+                .where(OutboundEmail.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]))
+                .values(
+                    attempts=case(
+                        (OutboundEmail.status == OutboxStatus.SENDING, OutboundEmail.attempts + 1),
+                        else_=OutboundEmail.attempts,
+                    ),
+                    status=OutboxStatus.SENDING,
+                    claimed_by=claim,
+                    next_attempt_at=now + timedelta(seconds=settings.outbox_lease_seconds),
+                )
+            )
+            await session.commit()
+            claimed = await session.scalars(
+                select(OutboundEmail).where(OutboundEmail.claimed_by == claim)
+            )
+            return claim, list(claimed.all())
+
+    async def _deliver(self, message: OutboundEmail) -> Optional[str]:
+        async with self._in_flight:
+            await self._rate_limiter.acquire(message.domain)
+            email = self.sender.build_message(
+                message.subject, [message.recipient], message.html_body, message.text_body
+            )
+            email["Message-ID"] = message_id(message.idempotency_key)
+            try:
+                await self.sender.deliver(email)
+            except Exception as exc:  # noqa: BLE001 - recorded and retried
+                logger.warning("Outbox delivery %s failed: %s", message.id, exc)
+                return str(exc)[:500] or exc.__class__.__name__
+        return None
+
+    async def _record(
+        self, claim: str, messages: list[OutboundEmail], errors: list[Optional[str]]
+    ) -> None:
+        """Store delivery results for rows this worker still holds.
+
+        Filtering on ``claim`` stops a worker whose lease expired from
+        overwriting the outcome of the worker that re-claimed the row.
+        """
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            sent_ids = [message.id for message, error in zip(messages, errors) if error is None]
+            if sent_ids:
+                await session.execute(
+                    update(OutboundEmail)
+                    .where(OutboundEmail.id.in_(sent_ids), OutboundEmail.claimed_by == claim)
+                    .values(status=OutboxStatus.SENT, sent_at=now, last_error=None, claimed_by=None)
+                )
+            for message, error in zip(messages, errors):
+                if error is None:
+                    continue
+                attempts = message.attempts + 1
+                exhausted = attempts >= self.max_attempts
+                await session.execute(
+                    update(OutboundEmail)
+                    .where(OutboundEmail.id == message.id, OutboundEmail.claimed_by == claim)
+                    .values(
+                        status=OutboxStatus.FAILED if exhausted else OutboxStatus.PENDING,
+                        attempts=attempts,
+                        last_error=error,
+                        claimed_by=None,
+                        next_attempt_at=now + timedelta(seconds=retry_delay(attempts)),
+                    )
+                )
+            await session.commit()
+
+
+def message_id(idempotency_key: str) -> str:
+    """Stable Message-ID, so receivers can drop duplicates of a retried send.
+
+    Hashed because keys such as ``digest:daily:1:2026-10-17`` are not valid
+    in the local part of a Message-ID.
+    """
+    digest = hashlib.sha256(idempotency_key.encode()).hexdigest()[:32]
+    return f"<{digest}@{settings.mail_sender.rpartition('@')[2]}>"
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the ``attempts``-th failure."""
+    delay = min(
+        settings.outbox_backoff_max_seconds,
+        settings.outbox_backoff_base_seconds * 2 ** (attempts - 1),
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    stop = asyncio.Event()
+    try:
+        await OutboxWorker().run_forever(stop)
+    finally:
+        await email_sender.pool.close()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,55 +1,141 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from email.message import EmailMessage
-from typing import Iterable, Optional
+from typing import AsyncIterator, Iterable, Optional
 
 import aiosmtplib
 
-from ..core.config import get_settings
+from ..core.config import Settings, get_settings
+from ..core.metrics import email_send_total
 
 logger = logging.getLogger(__name__)
 
 
+class SMTPConnectionPool:
+    """Pool of persistent, authenticated SMTP connections.
+
+    At most ``size`` connections are open at once. A connection is reused
+    until it has sent ``max_messages`` messages or the connection itself
+    fails, in which case it is discarded and a fresh one is opened on the
+    next checkout. Errors about a single message, such as a refused
+    recipient, keep the connection: aiosmtplib resets the envelope on them.
+    """
+
+    def __init__(self, settings: Settings, size: int, max_messages: int) -> None:
+        self.settings = settings
+        self.size = size
+        self.max_messages = max_messages
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[tuple[aiosmtplib.SMTP, int]] = []
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        async with self._slots:
+            client, sent = await self._checkout()
+            try:
+                yield client
+            except OSError:
+                # Disconnects, timeouts and socket errors leave the session unusable.
+                await self._discard(client)
+                raise
+            except Exception:
+                await self._release(client, sent + 1)
+                raise
+            except BaseException:
+                # Cancelled mid-conversation: the server state is unknown.
+                client.close()
+                raise
+            await self._release(client, sent + 1)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+
+    async def _checkout(self) -> tuple[aiosmtplib.SMTP, int]:
+        while self._idle:
+            client, sent = self._idle.pop()
+            if client.is_connected:
+                return client, sent
+        client = aiosmtplib.SMTP(
+            hostname=self.settings.mail_smtp_host,
+            port=self.settings.mail_smtp_port,
+            start_tls=self.settings.mail_use_tls,
+            username=self.settings.mail_username,
+            password=self.settings.mail_password,
+        )
+        await client.connect()
+        return client, 0
+
+    async def _release(self, client: aiosmtplib.SMTP, sent: int) -> None:
+        if sent >= self.max_messages or not client.is_connected:
+            await self._discard(client)
+        else:
+            self._idle.append((client, sent))
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        if not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+
 class EmailSender:
-    def __init__(self) -> None:
-        self.settings = get_settings()
+    """SMTP transport used by the outbox worker; queue mail with ``enqueue_email``."""
 
-    async def send_email(
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self.pool = SMTPConnectionPool(
+            self.settings,
+            size=self.settings.mail_pool_size,
+            max_messages=self.settings.mail_connection_max_messages,
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.settings.mail_username and self.settings.mail_password)
+
+    def build_message(
         self,
         subject: str,
         recipients: Iterable[str],
         html_body: str,
         text_body: Optional[str] = None,
-    ) -> None:
+    ) -> EmailMessage:
         message = EmailMessage()
         message["Subject"] = subject
         message["From"] = f"{self.settings.mail_from_name} <{self.settings.mail_sender}>"
         message["To"] = ", ".join(recipients)
         message.set_content(text_body or "")
         message.add_alternative(html_body, subtype="html")
+        return message
 
-        if not self.settings.mail_username or not self.settings.mail_password:
+    async def deliver(self, message: EmailMessage) -> None:
+        if not self.configured:
             logger.warning("Mail credentials missing. Email not sent but logged.")
-            logger.info("Subject: %s\nBody: %s", subject, html_body)
+            html_part = message.get_body(("html",))
+            logger.info(
+                "Subject: %s\nBody: %s", message["Subject"], html_part.get_content() if html_part else ""
+            )
+            email_send_total.inc(outcome="logged")
             return
 
-        await aiosmtplib.send(
-            message,
-            hostname=self.settings.mail_smtp_host,
-            port=self.settings.mail_smtp_port,
-            start_tls=self.settings.mail_use_tls,
-            username=self.settings.mail_username,
-            password=self.settings.mail_password,
-        )
-
-    def send_in_background(
-        self,
-        subject: str,
-        recipients: Iterable[str],
-        html_body: str,
-        text_body: Optional[str] = None,
-    ) -> None:
-        asyncio.create_task(self.send_email(subject, recipients, html_body, text_body))
+        try:
+            try:
+                async with self.pool.connection() as client:
+                    await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # A pooled connection may have been closed by the server while
+                # idle; retry once on a fresh connection.
+                async with self.pool.connection() as client:
+                    await client.send_message(message)
+        except Exception:
+            email_send_total.inc(outcome="failed")
+            raise
+        email_send_total.inc(outcome="sent")
 
 
 email_sender = EmailSender()
@@ -0,0 +1,95 @@
+"""Render-once digest bodies.
+
+A digest body depends only on the card, the cycle, the date and the locale,
+never on the recipient. :class:`DigestRenderer` renders each distinct body
+once with a placeholder where the recipient's name goes and fills the name
+in with a plain string replacement per message.
+"""
+from __future__ import annotations
+
+import html
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+
+from ..services.card_science import DECK
+
+DEFAULT_LOCALE = "zh-Hans"
+# Contains no characters that autoescaping would rewrite.
+RECIPIENT_PLACEHOLDER = "__CARD_SCIENCE_RECIPIENT__"
+
+# Compiled templates are cached by the environment for the process lifetime.
+environment = Environment(
+    loader=FileSystemLoader("app/templates/email"),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+)
+
+
+@dataclass(frozen=True)
+class RenderedDigest:
+    subject: str
+    html_body: str
+
+    def personalize(self, recipient_name: str) -> str:
+        return self.html_body.replace(RECIPIENT_PLACEHOLDER, html.escape(recipient_name))
+
+
+class DigestRenderer:
+    """Per-send-run cache of rendered digest bodies."""
+
+    def __init__(self) -> None:
+        self._rendered: dict[tuple, RenderedDigest] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def daily(self, card_index: int, as_of: date, locale: Optional[str] = None) -> RenderedDigest:
+        card = DECK[card_index]
+        return self._render(
+            ("daily", card_index, as_of, locale or DEFAULT_LOCALE),
+            subject=f"今日牌 · {card.name}",
+            card=card,
+            as_of=as_of,
+        )
+
+    def cycle(
+        self, card_index: int, cycle_index: int, as_of: date, locale: Optional[str] = None
+    ) -> RenderedDigest:
+        card = DECK[card_index]
+        return self._render(
+            ("cycle", card_index, as_of, locale or DEFAULT_LOCALE, cycle_index),
+            subject=f"第 {cycle_index} 个周期 · {card.name} 的周期主题",
+            card=card,
+            as_of=as_of,
+            cycle_index=cycle_index,
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._rendered), "hits": self.hits, "misses": self.misses}
+
+    def _render(self, key: tuple, subject: str, **context: object) -> RenderedDigest:
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self.hits += 1
+            return rendered
+
+        self.misses += 1
+        kind, locale = key[0], key[3]
+        rendered = RenderedDigest(
+            subject=subject,
+            html_body=_template(kind, locale).render(recipient=RECIPIENT_PLACEHOLDER, **context),
+        )
+        self._rendered[key] = rendered
+        return rendered
+
+
+def _template(kind: str, locale: str):
+    try:
+        return environment.get_template(f"{locale}/{kind}.html")
+    except TemplateNotFound:
+        return environment.get_template(f"{DEFAULT_LOCALE}/{kind}.html")
+
+
+__all__ = ["DigestRenderer", "RenderedDigest", "RECIPIENT_PLACEHOLDER"]
@@ -1,21 +1,35 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
-
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
+from .core import metrics
+from .core.assets import PrecompressedStaticFiles
+from .core.profiling import ProfilerMiddleware
 from .core.config import get_settings
-from .database import Base, engine
-from .routers import auth, insights, users, web
+from .database import dispose_engines, ensure_schema
+from .dependencies import get_admin_principal
+from .routers import admin, auth, insights, users, web
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.db_create_all:
+        await ensure_schema()
+
+    stop_outbox = asyncio.Event()
+    outbox_task = None
+    if settings.outbox_worker_in_process:
+        from .email.outbox import OutboxWorker
+
+        outbox_task = asyncio.create_task(OutboxWorker().run_forever(stop_outbox))
     yield
+    if outbox_task is not None:
+        stop_outbox.set()
+        await outbox_task
+    await dispose_engines()
 
 
 settings = get_settings()
@@ -28,12 +42,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilerMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(web.router)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(), name="static")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(insights.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 @app.get("/health", tags=["system"])
@@ -41,4 +59,12 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+if settings.metrics_enabled:
+
+    # Scrape with an admin token or the X-Service-Key header.
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_admin_principal)])
+    async def metrics_endpoint() -> Response:
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 __all__ = ["app"]
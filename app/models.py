@@ -2,8 +2,8 @@ import enum
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, String, UniqueConstraint
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Date, DateTime, Enum, ForeignKey, Index, SmallInteger, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from .database import Base
 
@@ -13,8 +13,17 @@ class SubscriptionPlan(str, enum.Enum):
     PREMIUM = "premium"
 
 
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 class User(Base):
     __tablename__ = "users"
+    # Keyset pagination over premium users in the digest dispatcher.
+    __table_args__ = (Index("ix_users_plan_id", "subscription_plan", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
@@ -38,25 +47,60 @@ class User(Base):
 
 class BirthProfile(Base):
     __tablename__ = "birth_profiles"
-    __table_args__ = (UniqueConstraint("user_id", name="uq_birth_profile_user"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", name="uq_birth_profile_user"),
+        Index("ix_birth_profiles_ordinal_user", "birth_ordinal", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     birth_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Day of the year of ``birth_date`` (1-366), kept in sync by the
+    # validator below so card buckets can be selected through an index.
+    birth_ordinal: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     timezone: Mapped[Optional[str]] = mapped_column(String(64))
     preferred_deck: Mapped[Optional[str]] = mapped_column(String(32), default="standard")
 
     user: Mapped[User] = relationship("User", back_populates="profile")
 
+    @validates("birth_date")
+    def _sync_birth_ordinal(self, key: str, value: date) -> date:
+        self.birth_ordinal = value.timetuple().tm_yday
+        return value
+
 
 class EmailPreference(Base):
     __tablename__ = "email_preferences"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     daily_digest_enabled: Mapped[bool] = mapped_column(default=True)
     cycle_digest_enabled: Mapped[bool] = mapped_column(default=True)
     last_daily_sent: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     last_cycle_sent: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     user: Mapped[User] = relationship("User", back_populates="email_preferences")
+
+
+class OutboundEmail(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    idempotency_key: Mapped[str] = mapped_column(String(128), unique=True)
+    recipient: Mapped[str] = mapped_column(String(255))
+    domain: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(255))
+    html_body: Mapped[str] = mapped_column(Text)
+    text_body: Mapped[Optional[str]] = mapped_column(Text)
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    # Naive UTC, like the other timestamps. While a row is being sent this
+    # holds the end of the worker's lease, after which it may be reclaimed.
+    next_attempt_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(64))
+    last_error: Mapped[Optional[str]] = mapped_column(String(500))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]]
@@ -1,3 +1,3 @@
-from . import auth, insights, users, web
+from . import admin, auth, insights, users, web
 
-__all__ = ["auth", "insights", "users", "web"]
+__all__ = ["admin", "auth", "insights", "users", "web"]
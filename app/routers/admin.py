@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from ..core.profiling import ProfilerBusy, profiler
+from ..dependencies import get_admin_principal
+from ..schemas import ProfileRequest
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_admin_principal)])
+
+
+@router.post(
+    "/profile",
+    response_class=Response,
+    responses={
+        200: {
+            "content": {"text/plain": {}, "application/octet-stream": {}},
+            "description": "collapsed 栈（flamegraph.pl / speedscope）、pstats 文本或 pstats 二进制转储",
+        }
+    },
+)
+async def profile_worker(payload: ProfileRequest) -> Response:
+    """Profile this worker for the next ``requests`` requests or ``seconds``.
+
+    Only the worker that serves this call is profiled.
+    """
+    if payload.format != "collapsed" and payload.mode != "cprofile":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="pstats 输出需要 cprofile 模式")
+    if payload.format == "collapsed" and payload.mode != "sampling":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="collapsed 输出需要 sampling 模式")
+    try:
+        session = profiler.start(payload.mode, payload.requests, payload.interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="已有分析任务在运行") from None
+    try:
+        await asyncio.wait_for(session.finished.wait(), timeout=payload.seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        if profiler.session is session:
+            profiler.stop()
+    await session.join()
+
+    headers = {
+        "X-Profile-Requests": str(session.requests),
+        "X-Profile-Samples": str(session.samples),
+        "X-Profile-Seconds": f"{session.duration:.3f}",
+    }
+    if payload.format == "pstats":
+        return Response(session.pstats_dump(), media_type="application/octet-stream", headers=headers)
+    if payload.format == "text":
+        return Response(session.pstats_text(), media_type="text/plain; charset=utf-8", headers=headers)
+    return Response(session.collapsed(), media_type="text/plain; charset=utf-8", headers=headers)
@@ -4,13 +4,21 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
 
-from ..core.security import create_access_token, get_password_hash, verify_password
+from ..core.config import get_settings
+from ..core.security import (
+    create_access_token,
+    get_password_hash_async,
+    profile_claims,
+    verify_password_async,
+)
 from ..database import get_session
 from ..models import BirthProfile, EmailPreference, SubscriptionPlan, User
 from ..schemas import LoginRequest, Token, UserCreate, UserRead
 
 router = APIRouter(prefix="/auth", tags=["auth"])
+settings = get_settings()
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
@@ -23,7 +31,7 @@ async def register_user(
 
     user = User(
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await get_password_hash_async(payload.password),
         full_name=payload.full_name,
         subscription_plan=SubscriptionPlan.FREE,
         created_at=datetime.utcnow(),
@@ -45,19 +53,31 @@ async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session),
 ) -> Token:
-    user = await session.scalar(select(User).where(User.email == form_data.username))
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await session.scalar(_user_by_email(form_data.username))
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="邮箱或密码错误")
 
-    token = create_access_token({"sub": str(user.id)})
-    return Token(access_token=token)
+    return _issue_token(user)
 
 
 @router.post("/login/json", response_model=Token)
 async def login_with_json(payload: LoginRequest, session: AsyncSession = Depends(get_session)) -> Token:
-    user = await session.scalar(select(User).where(User.email == payload.email))
-    if not user or not verify_password(payload.password, user.hashed_password):
+    user = await session.scalar(_user_by_email(payload.email))
+    if not user or not await verify_password_async(payload.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="邮箱或密码错误")
 
-    token = create_access_token({"sub": str(user.id)})
-    return Token(access_token=token)
+    return _issue_token(user)
+
+
+def _user_by_email(email: str):
+    query = select(User).where(User.email == email)
+    if settings.token_profile_claims:
+        query = query.options(joinedload(User.profile))
+    return query
+
+
+def _issue_token(user: User) -> Token:
+    claims = {"sub": str(user.id)}
+    if settings.token_profile_claims and user.profile:
+        claims.update(profile_claims(user.profile.birth_date))
+    return Token(access_token=create_access_token(claims))
@@ -1,62 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from ..dependencies import get_current_active_user
-from ..models import SubscriptionPlan, User
+import asyncio
+from datetime import date
+from typing import AsyncIterator, NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..database import get_read_session
+from ..dependencies import get_admin_principal, get_insight_birthday, get_plan_gated_user
+from ..models import BirthProfile, SubscriptionPlan, User
 from ..schemas import (
+    BatchForecastRequest,
     CardInsight,
+    CompatibilityGroupReport,
+    CompatibilityGroupRequest,
     CompatibilityInsight,
+    CompatibilityRankPage,
+    CompatibilityRankRequest,
     CompatibilityRequest,
     ForecastResponse,
     PersonalBlueprint,
 )
 from ..services.card_science import (
+    DECK_VERSION,
+    batch_cycle_card_indices,
+    batch_today_card_indices,
     build_compatibility_theme,
-    build_yearly_cycles,
     compatibility_lessons,
+    compatibility_matrix,
     compatibility_score,
-    derive_personal_blueprint,
-    draw_today_card,
+    cycle_card_indices,
+    local_as_of_ordinals,
+    personal_blueprint_json,
+    rank_partners,
 )
+from ..services.forecast_cache import forecast_cache
+from ..services.forecast_json import forecast_json, today_card_index, today_card_json
+from ..services.user_cache import UserSnapshot
+from ..utils.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from ..utils.responses import FastJSONResponse, dumps
+from ..utils.timezones import local_today, seconds_until_local_midnight, utc_now
 
 router = APIRouter(prefix="/insights", tags=["insights"])
 
+BATCH_CHUNK_SIZE = 256
+# The blueprint never changes for a given birthday; revalidate weekly so deck
+# updates still reach clients.
+PERSONAL_MAX_AGE = 7 * 24 * 60 * 60
+
 
 @router.get("/personal", response_model=PersonalBlueprint)
-async def get_personal_insight(current_user: User = Depends(get_current_active_user)) -> PersonalBlueprint:
-    if not current_user.profile:
+async def get_personal_insight(
+    request: Request, birthday: Optional[date] = Depends(get_insight_birthday)
+) -> Response:
+    if birthday is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请先填写生日信息")
-    blueprint = derive_personal_blueprint(current_user.profile.birth_date)
-    return blueprint
+    headers = cache_headers(make_etag("personal", DECK_VERSION, birthday), PERSONAL_MAX_AGE)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    # The blueprint table already holds the serialized body.
+    return FastJSONResponse(personal_blueprint_json(birthday), headers=headers)
 
 
 @router.get("/forecast", response_model=ForecastResponse)
-async def get_full_forecast(current_user: User = Depends(get_current_active_user)) -> ForecastResponse:
+async def get_full_forecast(
+    request: Request, current_user: UserSnapshot = Depends(get_plan_gated_user)
+) -> Response:
     if current_user.subscription_plan != SubscriptionPlan.PREMIUM:
         raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="升级为付费订阅以查看完整分析")
     if not current_user.profile:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请先填写生日信息")
 
     birthday = current_user.profile.birth_date
-    blueprint = derive_personal_blueprint(birthday)
-    cycles = build_yearly_cycles(birthday)
-    today = draw_today_card(birthday)
+    as_of, max_age, headers = _daily_cache_headers("forecast", birthday, current_user.profile.timezone)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+
+    def build() -> bytes:
+        # Assembled from cached fragments, like the batch endpoint, instead of
+        # building and re-validating the nested models.
+        return forecast_json(birthday, as_of, cycle_card_indices(birthday), today_card_index(birthday, as_of))
 
-    return ForecastResponse(personal_blueprint=blueprint, yearly_cycles=cycles, today_card=today)
+    body = await forecast_cache.get_or_build(birthday, as_of, max_age, build)
+    return FastJSONResponse(body, headers=headers)
 
 
 @router.get("/today", response_model=CardInsight)
-async def get_today_card(current_user: User = Depends(get_current_active_user)) -> CardInsight:
+async def get_today_card(
+    request: Request, current_user: UserSnapshot = Depends(get_plan_gated_user)
+) -> Response:
     if current_user.subscription_plan != SubscriptionPlan.PREMIUM:
         raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="升级为付费订阅以查看今日牌")
     if not current_user.profile:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请先填写生日信息")
-    return draw_today_card(current_user.profile.birth_date)
+
+    birthday = current_user.profile.birth_date
+    as_of, _, headers = _daily_cache_headers("today", birthday, current_user.profile.timezone)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    return FastJSONResponse(today_card_json(today_card_index(birthday, as_of)), headers=headers)
 
 
 @router.post("/compatibility", response_model=CompatibilityInsight)
 async def get_compatibility(
     payload: CompatibilityRequest,
-    current_user: User = Depends(get_current_active_user),
-) -> CompatibilityInsight:
+    current_user: UserSnapshot = Depends(get_plan_gated_user),
+) -> Response:
     if current_user.subscription_plan != SubscriptionPlan.PREMIUM:
         raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="升级为付费订阅以查看合盘")
     if not current_user.profile:
@@ -67,9 +117,170 @@ async def get_compatibility(
     lessons = compatibility_lessons(birthday, payload.partner_birth_date)
     theme = build_compatibility_theme(birthday, payload.partner_birth_date)
 
-    return CompatibilityInsight(
-        compatibility_score=score,
-        shared_lessons=lessons[:2],
-        growth_opportunities=lessons[2:],
-        relationship_theme=theme,
+    return FastJSONResponse(
+        {
+            "compatibility_score": score,
+            "shared_lessons": lessons[:2],
+            "growth_opportunities": lessons[2:],
+            "relationship_theme": theme,
+        }
+    )
+
+
+@router.post("/compatibility/rank", response_model=CompatibilityRankPage)
+async def rank_compatibility(
+    payload: CompatibilityRankRequest,
+    current_user: UserSnapshot = Depends(get_plan_gated_user),
+) -> Response:
+    birthday = _premium_birthday(current_user, "升级为付费订阅以查看合盘")
+    candidates = payload.candidate_birth_dates
+    positions, matrix = rank_partners(birthday, candidates, payload.limit, payload.offset)
+
+    return FastJSONResponse(
+        {
+            "total": len(candidates),
+            "offset": payload.offset,
+            "limit": payload.limit,
+            "items": [
+                {
+                    "candidate_index": int(position),
+                    "partner_birth_date": candidates[position],
+                    "compatibility_score": int(matrix.scores[0, position]),
+                    "relationship_theme": matrix.theme(0, position),
+                }
+                for position in positions
+            ],
+        }
+    )
+
+
+@router.post("/compatibility/group", response_model=CompatibilityGroupReport)
+async def get_group_compatibility(
+    payload: CompatibilityGroupRequest,
+    current_user: UserSnapshot = Depends(get_plan_gated_user),
+) -> Response:
+    import numpy as np
+
+    _premium_birthday(current_user, "升级为付费订阅以查看合盘")
+    matrix = compatibility_matrix(payload.birth_dates, payload.birth_dates)
+    size = len(payload.birth_dates)
+
+    # Only pairs of distinct members count towards averages and the best pair.
+    off_diagonal = np.where(np.eye(size, dtype=bool), -1, matrix.scores)
+    row, column = np.unravel_index(int(np.argmax(off_diagonal)), off_diagonal.shape)
+    averages = (matrix.scores.sum(axis=1) - np.diagonal(matrix.scores)) / (size - 1)
+
+    return FastJSONResponse(
+        {
+            "scores": matrix.scores.tolist(),
+            "average_scores": [round(float(value), 2) for value in averages],
+            "best_pair": [int(row), int(column)],
+            "best_pair_score": int(matrix.scores[row, column]),
+            "best_pair_theme": matrix.theme(row, column),
+        }
     )
+
+
+def _premium_birthday(current_user: UserSnapshot, upgrade_detail: str) -> date:
+    if current_user.subscription_plan != SubscriptionPlan.PREMIUM:
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=upgrade_detail)
+    if not current_user.profile:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请先填写生日信息")
+    return current_user.profile.birth_date
+
+
+def _daily_cache_headers(
+    kind: str, birthday: date, timezone: Optional[str]
+) -> tuple[date, int, dict[str, str]]:
+    """Resolve the user's local date, the seconds left in it and the headers
+    that cache until its end."""
+    now = utc_now()
+    as_of = local_today(timezone, now)
+    max_age = seconds_until_local_midnight(timezone, now)
+    etag = make_etag(kind, DECK_VERSION, birthday, as_of)
+    return as_of, max_age, cache_headers(etag, max_age)
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "每行一个 BatchForecastItem"}},
+    dependencies=[Depends(get_admin_principal)],
+)
+async def get_batch_forecasts(
+    payload: BatchForecastRequest, session: AsyncSession = Depends(get_read_session)
+) -> StreamingResponse:
+    rows: list[_BatchRow] = []
+    if payload.user_ids:
+        result = await session.execute(
+            select(User.id, BirthProfile.birth_date, BirthProfile.timezone)
+            .outerjoin(BirthProfile, BirthProfile.user_id == User.id)
+            .where(User.id.in_(payload.user_ids))
+        )
+        profiles = {user_id: (birthday, timezone) for user_id, birthday, timezone in result.all()}
+        for user_id in payload.user_ids:
+            if user_id not in profiles:
+                rows.append(_BatchRow(user_id, None, None, "user_not_found"))
+            elif profiles[user_id][0] is None:
+                rows.append(_BatchRow(user_id, None, None, "profile_missing"))
+            else:
+                rows.append(_BatchRow(user_id, *profiles[user_id]))
+    rows.extend(_BatchRow(None, birthday, None) for birthday in payload.birth_dates)
+
+    return StreamingResponse(_stream_forecasts(rows, payload.as_of), media_type="application/x-ndjson")
+
+
+class _BatchRow(NamedTuple):
+    user_id: Optional[int]
+    birth_date: Optional[date]
+    timezone: Optional[str]
+    error: Optional[str] = None
+
+
+async def _stream_forecasts(rows: list[_BatchRow], as_of: Optional[date]) -> AsyncIterator[bytes]:
+    import numpy as np
+
+    now = utc_now()
+    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+        chunk = rows[start : start + BATCH_CHUNK_SIZE]
+        valid = [row for row in chunk if row.error is None]
+        birthdays = [row.birth_date for row in valid]
+        # Without an explicit as_of every row uses its own local date.
+        as_of_ordinals = (
+            np.full(len(valid), as_of.toordinal(), dtype=np.int64)
+            if as_of
+            else local_as_of_ordinals([row.timezone for row in valid], now)
+        )
+        today_indices, _ = batch_today_card_indices(birthdays, as_of_ordinals)
+        cycle_indices, _ = batch_cycle_card_indices(birthdays)
+
+        lines: list[bytes] = []
+        position = 0
+        for row in chunk:
+            error = row.error
+            if error is None:
+                try:
+                    forecast = forecast_json(
+                        row.birth_date,
+                        date.fromordinal(int(as_of_ordinals[position])),
+                        cycle_indices[position],
+                        int(today_indices[position]),
+                    )
+                except ValueError:
+                    # 闰日生日在平年没有对应的周期起点。
+                    error = "invalid_cycle_reference"
+                position += 1
+            if error is not None:
+                lines.append(
+                    dumps(
+                        {"user_id": row.user_id, "birth_date": row.birth_date, "forecast": None, "error": error}
+                    )
+                )
+                continue
+            lines.append(
+                b'{"user_id":%b,"birth_date":"%b","forecast":%b,"error":null}'
+                % (dumps(row.user_id), row.birth_date.isoformat().encode(), forecast)
+            )
+        yield b"\n".join(lines) + b"\n"
+        # Give other requests on this worker a chance between chunks.
+        await asyncio.sleep(0)
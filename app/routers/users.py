@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.security import get_password_hash_async
 from ..database import get_session
-from ..dependencies import get_current_active_user
+from ..dependencies import (
+    get_cached_user,
+    get_current_user_only,
+    get_current_user_with_preferences,
+    get_current_user_with_preferences_readonly,
+    get_current_user_with_profile,
+    get_plan_gated_user,
+)
 from ..models import BirthProfile, EmailPreference, SubscriptionPlan, User
 from ..schemas import (
     BirthProfileRead,
@@ -12,53 +20,56 @@ from ..schemas import (
     UserRead,
     UserUpdate,
 )
+from ..services.user_cache import UserSnapshot, invalidate_user
+from ..utils.responses import FastJSONResponse, orm_fields
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: User = Depends(get_current_active_user)) -> UserRead:
-    return UserRead.from_orm(current_user)
+async def get_me(current_user: UserSnapshot = Depends(get_cached_user)) -> Response:
+    return FastJSONResponse(orm_fields(UserRead, current_user))
 
 
 @router.patch("/me", response_model=UserRead)
 async def update_me(
     payload: UserUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_with_profile),
 ) -> UserRead:
     if payload.full_name is not None:
         current_user.full_name = payload.full_name
     if payload.password:
-        from ..core.security import get_password_hash
-
-        current_user.hashed_password = get_password_hash(payload.password)
+        current_user.hashed_password = await get_password_hash_async(payload.password)
     if payload.timezone and current_user.profile:
         current_user.profile.timezone = payload.timezone
 
     session.add(current_user)
     await session.commit()
+    invalidate_user(current_user.id)
     await session.refresh(current_user)
     return UserRead.from_orm(current_user)
 
 
 @router.get("/me/profile", response_model=BirthProfileRead)
-async def get_profile(current_user: User = Depends(get_current_active_user)) -> BirthProfileRead:
+async def get_profile(current_user: UserSnapshot = Depends(get_cached_user)) -> Response:
     if not current_user.profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile missing")
-    return BirthProfileRead.from_orm(current_user.profile)
+    return FastJSONResponse(orm_fields(BirthProfileRead, current_user.profile))
 
 
 @router.get("/me/subscription", response_model=SubscriptionStatus)
-async def get_subscription(current_user: User = Depends(get_current_active_user)) -> SubscriptionStatus:
-    return SubscriptionStatus(plan=current_user.subscription_plan, renewed_at=current_user.updated_at)
+async def get_subscription(current_user: UserSnapshot = Depends(get_plan_gated_user)) -> Response:
+    return FastJSONResponse(
+        {"plan": current_user.subscription_plan, "renewed_at": current_user.updated_at}
+    )
 
 
 @router.post("/me/subscription", response_model=SubscriptionStatus)
 async def update_subscription(
     payload: SubscriptionUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_only),
 ) -> SubscriptionStatus:
     if payload.plan == current_user.subscription_plan:
         return SubscriptionStatus(plan=current_user.subscription_plan, renewed_at=current_user.updated_at)
@@ -66,22 +77,25 @@ async def update_subscription(
     current_user.subscription_plan = payload.plan
     session.add(current_user)
     await session.commit()
+    invalidate_user(current_user.id)
     await session.refresh(current_user)
     return SubscriptionStatus(plan=current_user.subscription_plan, renewed_at=current_user.updated_at)
 
 
 @router.get("/me/email-preferences", response_model=EmailPreferenceRead)
-async def get_email_preferences(current_user: User = Depends(get_current_active_user)) -> EmailPreferenceRead:
+async def get_email_preferences(
+    current_user: User = Depends(get_current_user_with_preferences_readonly),
+) -> Response:
     if not current_user.email_preferences:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preferences missing")
-    return EmailPreferenceRead.from_orm(current_user.email_preferences)
+    return FastJSONResponse(orm_fields(EmailPreferenceRead, current_user.email_preferences))
 
 
 @router.patch("/me/email-preferences", response_model=EmailPreferenceRead)
 async def update_email_preferences(
     payload: EmailPreferenceUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_with_preferences),
 ) -> EmailPreferenceRead:
     preferences = current_user.email_preferences
     if not preferences:
@@ -94,5 +108,6 @@ async def update_email_preferences(
 
     session.add(preferences)
     await session.commit()
+    invalidate_user(current_user.id)
     await session.refresh(preferences)
     return EmailPreferenceRead.from_orm(preferences)
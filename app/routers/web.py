@@ -1,34 +1,81 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
-from ..dependencies import get_current_active_user
-from ..models import SubscriptionPlan, User
-from ..services.card_science import derive_personal_blueprint
+from ..core.assets import static_url
+from ..core.config import get_settings
+from ..dependencies import get_cached_user
+from ..models import SubscriptionPlan
+from ..services.card_science import blueprint_key, derive_personal_blueprint
+from ..services.user_cache import UserSnapshot
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+    from markupsafe import Markup
 
 router = APIRouter(tags=["web"])
-templates = Jinja2Templates(directory="app/templates")
+settings = get_settings()
+
+# The pages are only written in this locale so far.
+LOCALE = "zh-Hans"
+
+# Rendered blueprint sections keyed by (blueprint key, plan, locale). The key
+# space is finite (at most 732 blueprint keys, plus "no birthday") and the
+# output only changes with a deploy, so entries never expire.
+_fragments: dict[tuple[Optional[tuple[int, bool]], SubscriptionPlan, str], "Markup"] = {}
+
+
+@lru_cache(maxsize=None)
+def templates() -> "Jinja2Templates":
+    # Jinja2 is imported on the first page view rather than at startup.
+    from fastapi.templating import Jinja2Templates
+    from jinja2 import FileSystemBytecodeCache
+
+    # Workers on one host share compiled templates through the bytecode cache.
+    templates = Jinja2Templates(
+        directory="app/templates",
+        bytecode_cache=FileSystemBytecodeCache(settings.template_cache_dir),
+        auto_reload=False,
+    )
+    templates.env.globals["static_url"] = static_url
+    return templates
+
+
+def blueprint_fragment(user: UserSnapshot) -> "Markup":
+    from markupsafe import Markup
+
+    profile = user.profile
+    plan = user.subscription_plan
+    key = (blueprint_key(profile.birth_date) if profile else None, plan, LOCALE)
+    fragment = _fragments.get(key)
+    if fragment is None:
+        blueprint = derive_personal_blueprint(profile.birth_date) if profile else None
+        template = templates().get_template("partials/dashboard_blueprint.html")
+        fragment = _fragments[key] = Markup(
+            template.render(blueprint=blueprint, is_premium=plan == SubscriptionPlan.PREMIUM)
+        )
+    return fragment
 
 
 @router.get("/", response_class=HTMLResponse)
 async def landing_page(request: Request) -> HTMLResponse:
-    return templates.TemplateResponse("index.html", {"request": request, "year": datetime.utcnow().year})
+    return templates().TemplateResponse("index.html", {"request": request, "year": datetime.utcnow().year})
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_cached_user),
 ) -> HTMLResponse:
-    profile = current_user.profile
-    blueprint = derive_personal_blueprint(profile.birth_date) if profile else None
-    return templates.TemplateResponse(
+    return templates().TemplateResponse(
         "dashboard.html",
         {
             "request": request,
             "user": current_user,
-            "blueprint": blueprint,
+            "blueprint_fragment": blueprint_fragment(current_user),
             "is_premium": current_user.subscription_plan == SubscriptionPlan.PREMIUM,
         },
     )
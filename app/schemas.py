@@ -95,6 +95,29 @@ class ForecastResponse(BaseModel):
     today_card: CardInsight
 
 
+class BatchForecastRequest(BaseModel):
+    user_ids: list[int] = Field(default_factory=list, max_items=10000)
+    birth_dates: list[date] = Field(default_factory=list, max_items=10000)
+    # Defaults to each user's local date (UTC for bare birth dates).
+    as_of: Optional[date] = None
+
+
+class ProfileRequest(BaseModel):
+    mode: str = Field("sampling", regex="^(sampling|cprofile)$")
+    # Stop after this many requests have finished, or when ``seconds`` pass.
+    requests: Optional[int] = Field(None, ge=1, le=10000)
+    seconds: float = Field(10.0, gt=0, le=300)
+    interval_ms: float = Field(5.0, ge=1, le=1000)
+    format: str = Field("collapsed", regex="^(collapsed|pstats|text)$")
+
+
+class BatchForecastItem(BaseModel):
+    user_id: Optional[int]
+    birth_date: Optional[date]
+    forecast: Optional[ForecastResponse]
+    error: Optional[str]
+
+
 class CompatibilityInsight(BaseModel):
     compatibility_score: int
     shared_lessons: list[str]
@@ -102,6 +125,38 @@ class CompatibilityInsight(BaseModel):
     relationship_theme: str
 
 
+class CompatibilityRankRequest(BaseModel):
+    candidate_birth_dates: list[date] = Field(min_items=1, max_items=10000)
+    limit: int = Field(20, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+
+
+class CompatibilityMatch(BaseModel):
+    candidate_index: int
+    partner_birth_date: date
+    compatibility_score: int
+    relationship_theme: str
+
+
+class CompatibilityRankPage(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: list[CompatibilityMatch]
+
+
+class CompatibilityGroupRequest(BaseModel):
+    birth_dates: list[date] = Field(min_items=2, max_items=50)
+
+
+class CompatibilityGroupReport(BaseModel):
+    scores: list[list[int]]
+    average_scores: list[float]
+    best_pair: list[int]
+    best_pair_score: int
+    best_pair_theme: str
+
+
 class SubscriptionUpdate(BaseModel):
     plan: SubscriptionPlan
 
@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+import calendar
+import hashlib
+import json
 from dataclasses import dataclass
-from datetime import date, timedelta
-from typing import Iterable
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Sequence, Union
 
+from ..core.metrics import card_science_duration, timed
 from ..schemas import CardInsight, CycleInsight, PersonalBlueprint
+from ..utils.timezones import local_today, utc_now
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _timed(func):
+    """Report the call time of a public entry point under its own name.
+
+    Only for batch-sized work: the wrapper costs about as much as a scalar
+    lookup such as :func:`derive_personal_blueprint`, so those stay untimed.
+    """
+    return timed(card_science_duration, function=func.__name__)(func)
 
 
 @dataclass(frozen=True)
@@ -70,7 +89,11 @@ DECK: list[CardDefinition] = [
     CardDefinition("King of Spades", "Master teacher.", "Share the blueprint that transformed you."),
 ]
 
+# Changes whenever the deck texts change, so cached responses can be keyed on it.
+DECK_VERSION = hashlib.sha256(repr(DECK).encode()).hexdigest()[:12]
+
 SPECIAL_FAMILY_DATES = {(1, 1), (12, 31)}
+CYCLE_CARD_STEP = 5
 
 
 def day_of_year_with_leap(birthday: date) -> int:
@@ -78,12 +101,69 @@ def day_of_year_with_leap(birthday: date) -> int:
     return (birthday - start_of_year).days + 1
 
 
+def card_index(birthday: date, offset: int = 0) -> int:
+    """Index into ``DECK`` of :func:`pick_card_by_offset`."""
+    return (day_of_year_with_leap(birthday) - 1 + offset) % len(DECK)
+
+
 def pick_card_by_offset(birthday: date, offset: int = 0) -> CardDefinition:
-    index = (day_of_year_with_leap(birthday) - 1 + offset) % len(DECK)
-    return DECK[index]
+    return DECK[card_index(birthday, offset)]
+
+
+def cycle_card_indices(birthday: date, cycle_count: int = 7) -> list[int]:
+    """Cycle card indices of :func:`build_yearly_cycles`, without numpy."""
+    return [card_index(birthday, index * CYCLE_CARD_STEP) for index in range(cycle_count)]
 
 
 def derive_personal_blueprint(birthday: date) -> PersonalBlueprint:
+    """Return the shared, precomputed blueprint for ``birthday``.
+
+    The returned model is cached process-wide and must not be mutated.
+    """
+    return lookup_blueprint(birthday).blueprint
+
+
+def personal_blueprint_json(birthday: date) -> bytes:
+    """Return the serialized blueprint for ``birthday`` as UTF-8 JSON bytes."""
+    return lookup_blueprint(birthday).json_bytes
+
+
+@dataclass(frozen=True)
+class BlueprintEntry:
+    blueprint: PersonalBlueprint
+    json_bytes: bytes
+
+
+def blueprint_key(birthday: date) -> tuple[int, bool]:
+    """Key of the blueprint table: ordinal day of the year and leap flag."""
+    return day_of_year_with_leap(birthday), calendar.isleap(birthday.year)
+
+
+def lookup_blueprint(birthday: date) -> BlueprintEntry:
+    return _blueprint_table()[blueprint_key(birthday)]
+
+
+@lru_cache(maxsize=None)
+def _blueprint_table() -> Mapping[tuple[int, bool], BlueprintEntry]:
+    # A blueprint depends only on the day of the year and, for the special
+    # family check on 31 December, on whether the year is a leap year. Build
+    # every outcome once from a representative year of each kind.
+    table: dict[tuple[int, bool], BlueprintEntry] = {}
+    for year in (2001, 2000):
+        current = date(year, 1, 1)
+        while current.year == year:
+            blueprint = _build_personal_blueprint(current)
+            table[blueprint_key(current)] = BlueprintEntry(
+                blueprint=blueprint,
+                json_bytes=json.dumps(
+                    blueprint.dict(), ensure_ascii=False, separators=(",", ":")
+                ).encode("utf-8"),
+            )
+            current += timedelta(days=1)
+    return MappingProxyType(table)
+
+
+def _build_personal_blueprint(birthday: date) -> PersonalBlueprint:
     life_card = pick_card_by_offset(birthday)
     ruling_card = pick_card_by_offset(birthday, offset=7)
     is_special_family = (birthday.month, birthday.day) in SPECIAL_FAMILY_DATES
@@ -107,14 +187,18 @@ def derive_personal_blueprint(birthday: date) -> PersonalBlueprint:
     )
 
 
-def build_yearly_cycles(birthday: date, cycle_count: int = 7) -> list[CycleInsight]:
-    start_year = date.today().year
+@_timed
+def build_yearly_cycles(
+    birthday: date, cycle_count: int = 7, as_of: Optional[date] = None
+) -> list[CycleInsight]:
+    """Cycles of the year of ``as_of`` (server-local today if omitted)."""
+    start_year = (as_of or date.today()).year
     start_reference = date(start_year, birthday.month, birthday.day)
     cycles: list[CycleInsight] = []
     for index in range(cycle_count):
         cycle_start = start_reference + timedelta(days=index * 52)
         cycle_end = cycle_start + timedelta(days=51)
-        card = pick_card_by_offset(birthday, offset=index * 5)
+        card = pick_card_by_offset(birthday, offset=index * CYCLE_CARD_STEP)
         cycles.append(
             CycleInsight(
                 cycle_index=index + 1,
@@ -127,8 +211,9 @@ def build_yearly_cycles(birthday: date, cycle_count: int = 7) -> list[CycleInsig
     return cycles
 
 
-def draw_today_card(birthday: date) -> CardInsight:
-    today = date.today()
+def draw_today_card(birthday: date, as_of: Optional[date] = None) -> CardInsight:
+    """Card of the day ``as_of`` (server-local today if omitted)."""
+    today = as_of or date.today()
     days_since_birthday = (today - birthday).days
     card = pick_card_by_offset(birthday, offset=days_since_birthday)
     return _to_insight("今日牌", card)
@@ -139,17 +224,19 @@ def compatibility_score(primary: date, partner: date) -> int:
     return 100 - (difference % 52) * 2
 
 
+COMPATIBILITY_LESSONS = (
+    "共同探索信任与亲密的节奏。",
+    "学习在彼此的价值观之间找到平衡。",
+    "彼此鼓励坚持灵魂使命。",
+    "激励对方更深刻地表达爱与愿景。",
+)
+
+
 def compatibility_lessons(primary: date, partner: date) -> list[str]:
-    base_messages = [
-        "共同探索信任与亲密的节奏。",
-        "学习在彼此的价值观之间找到平衡。",
-        "彼此鼓励坚持灵魂使命。",
-        "激励对方更深刻地表达爱与愿景。",
-    ]
     offset = (day_of_year_with_leap(primary) + day_of_year_with_leap(partner)) % len(
-        base_messages
+        COMPATIBILITY_LESSONS
     )
-    return rotate(base_messages, offset)
+    return rotate(COMPATIBILITY_LESSONS, offset)
 
 
 def rotate(items: Iterable[str], offset: int) -> list[str]:
@@ -162,9 +249,280 @@ def rotate(items: Iterable[str], offset: int) -> list[str]:
 
 def build_compatibility_theme(primary: date, partner: date) -> str:
     card = pick_card_by_offset(primary, offset=day_of_year_with_leap(partner) % len(DECK))
+    return compatibility_theme(card)
+
+
+def compatibility_theme(card: CardDefinition) -> str:
     return f"关系的核心能量来自 {card.name}"
 
 
+# Batch engine -------------------------------------------------------------
+#
+# The helpers below mirror the scalar functions above over whole arrays of
+# birthdays. They only produce integer arrays (card indices into ``DECK`` and
+# day offsets); use ``BirthdayBatch.blueprint`` or ``card_insight`` to build
+# schema objects for the rows that are actually needed. numpy is imported by
+# the functions themselves, so single-user requests never load it.
+
+BirthdayArray = Union["np.ndarray", Sequence[date], Sequence[int]]
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass(frozen=True)
+class BirthdayBatch:
+    ordinals: np.ndarray
+    day_of_year: np.ndarray
+    is_leap: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def blueprint(self, row: int) -> PersonalBlueprint:
+        key = (int(self.day_of_year[row]), bool(self.is_leap[row]))
+        return _blueprint_table()[key].blueprint
+
+
+@dataclass(frozen=True)
+class BlueprintIndices:
+    life: np.ndarray
+    ruling: np.ndarray
+    soul_resource: np.ndarray
+    soul_challenge: np.ndarray
+    is_special_family: np.ndarray
+
+
+def birthday_batch(birthdays: BirthdayArray) -> BirthdayBatch:
+    """Normalise birthdays to a :class:`BirthdayBatch`.
+
+    Accepts ``datetime64`` arrays, sequences of :class:`date` (a
+    :class:`datetime` counts as its date) or integer proleptic Gregorian
+    ordinals as returned by :meth:`date.toordinal`.
+    """
+    import numpy as np
+
+    if isinstance(birthdays, BirthdayBatch):
+        return birthdays
+    ordinals = _to_ordinals(birthdays)
+    years = _to_datetime64(ordinals).astype("datetime64[Y]")
+    day_of_year = ordinals - _to_ordinals(years.astype("datetime64[D]")) + 1
+    year_numbers = years.astype(np.int64) + 1970
+    is_leap = (year_numbers % 4 == 0) & ((year_numbers % 100 != 0) | (year_numbers % 400 == 0))
+    return BirthdayBatch(ordinals=ordinals, day_of_year=day_of_year, is_leap=is_leap)
+
+
+def card_birth_ordinals(index: int, offset: int = 0) -> list[int]:
+    """Days of the year (1-366) whose card at ``offset`` is ``DECK[index]``.
+
+    Matches ``BirthProfile.birth_ordinal``, so a card bucket can be selected
+    with an indexed ``IN`` query.
+    """
+    first = (index - offset) % len(DECK) + 1
+    return list(range(first, 367, len(DECK)))
+
+
+def batch_card_indices(birthdays: BirthdayArray, offsets: Union[int, np.ndarray] = 0) -> np.ndarray:
+    """Vectorised :func:`pick_card_by_offset` returning indices into ``DECK``."""
+    return _card_indices(birthday_batch(birthdays).day_of_year, offsets)
+
+
+@_timed
+def batch_blueprint_indices(birthdays: BirthdayArray) -> BlueprintIndices:
+    """Card indices of :func:`derive_personal_blueprint` for every birthday.
+
+    Soul cards are ``-1`` for the special family.
+    """
+    import numpy as np
+
+    batch = birthday_batch(birthdays)
+    is_special_family = (batch.day_of_year == 1) | (batch.day_of_year == 365 + batch.is_leap)
+    return BlueprintIndices(
+        life=batch_card_indices(batch),
+        ruling=batch_card_indices(batch, 7),
+        soul_resource=np.where(is_special_family, -1, batch_card_indices(batch, 14)),
+        soul_challenge=np.where(is_special_family, -1, batch_card_indices(batch, 21)),
+        is_special_family=is_special_family,
+    )
+
+
+@_timed
+def batch_today_card_indices(
+    birthdays: BirthdayArray, as_of: Union[date, BirthdayArray, None] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised :func:`draw_today_card`: ``(card indices, day offsets)``.
+
+    ``as_of`` is either one date for every row or an array of per-row dates,
+    e.g. from :func:`local_as_of_ordinals`.
+    """
+    batch = birthday_batch(birthdays)
+    offsets = _as_of_ordinals(as_of) - batch.ordinals
+    return batch_card_indices(batch, offsets), offsets
+
+
+@_timed
+def batch_cycle_card_indices(
+    birthdays: BirthdayArray, cycle_count: int = 7
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised cycle cards of :func:`build_yearly_cycles`.
+
+    Returns an ``(n, cycle_count)`` array of card indices and the offsets used
+    for each cycle column.
+    """
+    import numpy as np
+
+    batch = birthday_batch(birthdays)
+    offsets = np.arange(cycle_count, dtype=np.int64) * CYCLE_CARD_STEP
+    return _card_indices(batch.day_of_year[:, np.newaxis], offsets), offsets
+
+
+@dataclass(frozen=True)
+class CompatibilityMatrix:
+    """Pairwise compatibility between ``primaries`` (rows) and ``partners``.
+
+    ``lesson_offsets`` index a rotation of ``COMPATIBILITY_LESSONS`` and
+    ``theme_indices`` index ``DECK``; see :meth:`lessons` and :meth:`theme`.
+    """
+
+    scores: np.ndarray
+    lesson_offsets: np.ndarray
+    theme_indices: np.ndarray
+
+    def lessons(self, row: int, column: int) -> list[str]:
+        return rotate(COMPATIBILITY_LESSONS, int(self.lesson_offsets[row, column]))
+
+    def theme(self, row: int, column: int) -> str:
+        return compatibility_theme(DECK[int(self.theme_indices[row, column])])
+
+
+@_timed
+def compatibility_matrix(primaries: BirthdayArray, partners: BirthdayArray) -> CompatibilityMatrix:
+    """Vectorised :func:`compatibility_score`, :func:`compatibility_lessons` and
+    :func:`build_compatibility_theme` over every (primary, partner) pair."""
+    import numpy as np
+
+    primary_days = birthday_batch(primaries).day_of_year[:, np.newaxis]
+    partner_days = birthday_batch(partners).day_of_year[np.newaxis, :]
+    return CompatibilityMatrix(
+        scores=100 - (np.abs(primary_days - partner_days) % 52) * 2,
+        lesson_offsets=(primary_days + partner_days) % len(COMPATIBILITY_LESSONS),
+        theme_indices=_card_indices(primary_days, partner_days % len(DECK)),
+    )
+
+
+@_timed
+def rank_partners(
+    primary: date, candidates: BirthdayArray, limit: int, offset: int = 0
+) -> tuple[np.ndarray, CompatibilityMatrix]:
+    """Rank ``candidates`` by compatibility with ``primary``.
+
+    Returns the candidate positions of the requested page, best first (ties
+    keep input order), and the ``1 x n`` matrix to read scores and themes
+    from.
+    """
+    import numpy as np
+
+    matrix = compatibility_matrix([primary], candidates)
+    scores = matrix.scores[0]
+    total = len(scores)
+    end = min(offset + limit, total)
+    if offset >= end:
+        return np.empty(0, dtype=np.int64), matrix
+    # Unique sort keys: higher score first, then lower position.
+    keys = (100 - scores) * total + np.arange(total)
+    if end < total:
+        candidates_idx = np.argpartition(keys, end - 1)[:end]
+    else:
+        candidates_idx = np.arange(total)
+    ordered = candidates_idx[np.argsort(keys[candidates_idx])]
+    return ordered[offset:end], matrix
+
+
+@_timed
+def batch_cycle_positions(
+    birthdays: BirthdayArray, as_of: Union[date, BirthdayArray, None] = None, cycle_count: int = 7
+) -> tuple[np.ndarray, np.ndarray]:
+    """Locate ``as_of`` within the cycles of :func:`build_yearly_cycles`.
+
+    Returns the 1-based cycle index (``0`` outside every cycle, or when the
+    birthday does not exist in that year) and the day within the cycle, so
+    ``(index > 0) & (day == 0)`` marks the first day of a new cycle.
+    """
+    import numpy as np
+
+    batch = birthday_batch(birthdays)
+    as_of_days = _to_datetime64(_as_of_ordinals(as_of)) + np.zeros(len(batch), dtype="timedelta64[D]")
+    birth_days = _to_datetime64(batch.ordinals)
+
+    birth_months = birth_days.astype("datetime64[M]")
+    month_numbers = birth_months.astype(np.int64) % 12
+    day_in_month = birth_days - birth_months.astype("datetime64[D]")
+    as_of_years = as_of_days.astype("datetime64[Y]")
+    references = (as_of_years.astype("datetime64[M]") + month_numbers).astype("datetime64[D]") + day_in_month
+    exists = references.astype("datetime64[M]").astype(np.int64) % 12 == month_numbers
+
+    elapsed = (as_of_days - references).astype(np.int64)
+    inside = exists & (elapsed >= 0) & (elapsed < cycle_count * 52)
+    cycle_index = np.where(inside, elapsed // 52 + 1, 0)
+    day_in_cycle = np.where(inside, elapsed % 52, 0)
+    return cycle_index, day_in_cycle
+
+
+@_timed
+def local_as_of_ordinals(
+    timezones: Sequence[Optional[str]], now: Optional[datetime] = None
+) -> np.ndarray:
+    """Local date ordinal of ``now`` in each timezone (UTC when unset).
+
+    Each distinct timezone is resolved once, so whole zones share one lookup.
+    """
+    import numpy as np
+
+    now = now or utc_now()
+    zone_ordinals = {zone: local_today(zone, now).toordinal() for zone in set(timezones)}
+    return np.fromiter((zone_ordinals[zone] for zone in timezones), dtype=np.int64, count=len(timezones))
+
+
+def card_insight(title: str, index: int) -> CardInsight:
+    return _to_insight(title, DECK[int(index)])
+
+
+def _as_of_ordinals(as_of: Union[date, BirthdayArray, None]) -> Union[int, np.ndarray]:
+    if as_of is None:
+        return date.today().toordinal()
+    if isinstance(as_of, date):
+        return as_of.toordinal()
+    return birthday_batch(as_of).ordinals
+
+
+def _card_indices(day_of_year: np.ndarray, offsets: Union[int, np.ndarray]) -> np.ndarray:
+    return (day_of_year - 1 + offsets) % len(DECK)
+
+
+def _to_ordinals(birthdays: BirthdayArray) -> np.ndarray:
+    import numpy as np
+
+    if isinstance(birthdays, np.ndarray):
+        if np.issubdtype(birthdays.dtype, np.datetime64):
+            return birthdays.astype("datetime64[D]").astype(np.int64) + _UNIX_EPOCH_ORDINAL
+        if np.issubdtype(birthdays.dtype, np.integer):
+            return birthdays.astype(np.int64)
+    # Going through an object array is several times slower than reading the
+    # ordinals directly, and cannot convert ``datetime`` values at all.
+    return np.fromiter(map(_ordinal, birthdays), dtype=np.int64, count=len(birthdays))
+
+
+def _ordinal(value: Union[date, int]) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() if isinstance(value, date) else int(value)
+
+
+def _to_datetime64(ordinals: Union[int, np.ndarray]) -> np.ndarray:
+    import numpy as np
+
+    return (np.asarray(ordinals, dtype=np.int64) - _UNIX_EPOCH_ORDINAL).astype("datetime64[D]")
+
+
 def _to_insight(title: str, card: CardDefinition | None) -> CardInsight:
     if card is None:
         raise ValueError("Card definition is required")
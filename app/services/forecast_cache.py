@@ -0,0 +1,160 @@
+"""Serialized forecasts keyed by birthday and the user's local date.
+
+A forecast only depends on the birthday and the local date it is drawn for,
+so users with the same birthday in the same calendar day share one entry.
+Cycles only move on a date change, so expiring at the next local midnight
+also covers cycle boundaries.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Optional, Protocol
+
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..core.metrics import StatsGauge
+from .card_science import DECK_VERSION
+
+# Upper bound for a single local day, including a DST fall-back hour.
+MAX_ENTRY_SECONDS = 25 * 60 * 60
+
+
+class ForecastBackend(Protocol):
+    """Store shared between worker processes."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+
+class FileForecastBackend:
+    """One file per entry, prefixed with its wall-clock expiry time.
+
+    Files are replaced atomically, so concurrent workers never read partial
+    entries. Expired or unreadable files are removed when they are next read,
+    and at most every ``sweep_interval`` seconds each process sweeps the
+    directory, because keys for past dates are never read again.
+    """
+
+    def __init__(self, directory: str, sweep_interval: float = 60 * 60) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, self.directory / key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._write, self.directory / key, value, time.time() + ttl)
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            await asyncio.to_thread(self.sweep)
+
+    def sweep(self) -> int:
+        """Delete expired, corrupt and abandoned temporary files; returns the count."""
+        now = time.time()
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                if path.name.startswith(".tmp-"):
+                    # Left behind by a worker killed between mkstemp and replace.
+                    expired = path.stat().st_mtime < now - self.sweep_interval
+                else:
+                    with path.open("rb") as handle:
+                        expires_at = _expiry(handle.readline())
+                    expired = expires_at is None or expires_at <= now
+            except FileNotFoundError:
+                continue
+            if expired:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _read(path: Path) -> Optional[bytes]:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        header, _, value = data.partition(b"\n")
+        expires_at = _expiry(header)
+        if expires_at is None or expires_at <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return value
+
+    def _write(self, path: Path, value: bytes, expires_at: float) -> None:
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(b"%f\n" % expires_at)
+                handle.write(value)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def _expiry(header: bytes) -> Optional[float]:
+    """Expiry time from an entry's first line, ``None`` if it is corrupt."""
+    try:
+        return float(header)
+    except ValueError:
+        return None
+
+
+class ForecastCache:
+    """Process-local LRU in front of an optional shared backend."""
+
+    def __init__(self, maxsize: int, backend: Optional[ForecastBackend] = None) -> None:
+        self.local: TTLCache[tuple[date, date], bytes] = TTLCache(maxsize=maxsize, ttl=MAX_ENTRY_SECONDS)
+        self.backend = backend
+        self.builds = 0
+
+    async def get_or_build(
+        self, birthday: date, as_of: date, ttl: float, build: Callable[[], bytes]
+    ) -> bytes:
+        """Return the cached forecast, calling ``build`` on a miss.
+
+        ``ttl`` is the time left until the requesting user's next local
+        midnight.
+        """
+        key = (birthday, as_of)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        shared_key = f"{DECK_VERSION}_{birthday.isoformat()}_{as_of.isoformat()}"
+        if self.backend is not None:
+            value = await self.backend.get(shared_key)
+        if value is None:
+            value = build()
+            self.builds += 1
+            if self.backend is not None and ttl > 0:
+                await self.backend.set(shared_key, value, ttl)
+        self.local.set(key, value, ttl)
+        return value
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {**self.local.stats(), "builds": self.builds}
+
+
+settings = get_settings()
+forecast_cache = ForecastCache(
+    maxsize=settings.forecast_cache_size,
+    backend=FileForecastBackend(settings.forecast_cache_dir) if settings.forecast_cache_dir else None,
+)
+StatsGauge("forecast_cache", "Forecast cache counters.", lambda: [({}, forecast_cache.stats())])
+
+
+__all__ = ["FileForecastBackend", "ForecastBackend", "ForecastCache", "forecast_cache"]
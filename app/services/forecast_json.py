@@ -0,0 +1,48 @@
+"""Serialized forecast bodies assembled from cached per-card fragments.
+
+Shared by the insight endpoints and the benchmarks that check them against
+the ``ForecastResponse`` schema.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+from ..utils.responses import dumps
+from .card_science import DECK, card_index, card_insight, personal_blueprint_json
+
+
+def forecast_json(birthday: date, as_of: date, cycle_indices, today_index: int) -> bytes:
+    """JSON body of ``ForecastResponse`` for ``birthday`` on ``as_of``."""
+    start_reference = date(as_of.year, birthday.month, birthday.day)
+    cycles = []
+    for index, deck_index in enumerate(cycle_indices):
+        card = DECK[int(deck_index)]
+        cycle_start = start_reference + timedelta(days=index * 52)
+        cycles.append(
+            {
+                "cycle_index": index + 1,
+                "cycle_start": cycle_start,
+                "cycle_end": cycle_start + timedelta(days=51),
+                "theme": f"{card.name} 的周期主题",
+                "advice": card.advice,
+            }
+        )
+    return b'{"personal_blueprint":%b,"yearly_cycles":%b,"today_card":%b}' % (
+        personal_blueprint_json(birthday),
+        dumps(cycles),
+        today_card_json(today_index),
+    )
+
+
+def today_card_index(birthday: date, as_of: date) -> int:
+    """:func:`draw_today_card`, as an index into ``DECK``."""
+    return card_index(birthday, (as_of - birthday).days)
+
+
+@lru_cache(maxsize=None)
+def today_card_json(index: int) -> bytes:
+    return dumps(card_insight("今日牌", index))
+
+
+__all__ = ["forecast_json", "today_card_index", "today_card_json"]
@@ -0,0 +1,72 @@
+"""Cached, read-only snapshots of authenticated users."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..core.metrics import StatsGauge
+from ..models import SubscriptionPlan, User
+
+
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    birth_date: date
+    timezone: Optional[str]
+    preferred_deck: Optional[str]
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached copy of the ``User`` columns read by the hot endpoints.
+
+    Attribute names mirror the ORM model so the ``orm_mode`` schemas and the
+    templates accept a snapshot wherever they accept a ``User``.
+
+    Invalidation is per process, so ``subscription_plan`` may be stale for up
+    to the cache TTL on other workers. Use it for display only; access checks
+    go through ``get_plan_gated_user``, which reads the plan fresh.
+    """
+
+    id: int
+    email: Optional[str]
+    full_name: Optional[str]
+    subscription_plan: SubscriptionPlan
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    profile: Optional[ProfileSnapshot]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        profile = user.profile
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            subscription_plan=user.subscription_plan,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            profile=ProfileSnapshot(
+                birth_date=profile.birth_date,
+                timezone=profile.timezone,
+                preferred_deck=profile.preferred_deck,
+            )
+            if profile
+            else None,
+        )
+
+
+settings = get_settings()
+user_cache: TTLCache[str, UserSnapshot] = TTLCache(
+    maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds
+)
+StatsGauge("user_cache", "User snapshot cache counters.", lambda: [({}, user_cache.stats())])
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.invalidate(str(user_id))
+
+
+__all__ = ["ProfileSnapshot", "UserSnapshot", "invalidate_user", "user_cache"]
@@ -1,17 +1,17 @@
 """Runtime compatibility helpers for Python version differences."""
 from __future__ import annotations
 
-import inspect
+import sys
 from typing import ForwardRef
 
 _PATCH_ATTR = "__card_science_forwardref_patched__"
 
 
 def ensure_forwardref_recursive_guard_default() -> None:
-    """Monkey patch typing.ForwardRef for Python 3.13 compatibility.
+    """Monkey patch typing.ForwardRef for Python 3.12.4+ compatibility.
 
-    Python 3.13 introduced a required ``recursive_guard`` keyword-only argument on
-    :meth:`typing.ForwardRef._evaluate`. Pydantic v1 still invokes this private
+    Python 3.12.4 introduced a required ``recursive_guard`` keyword-only
+    argument on :meth:`typing.ForwardRef._evaluate`. Pydantic v1 still invokes this private
     method using the older positional signature which leads to ``TypeError``
     during application startup. The shim below restores the previous calling
     convention by injecting a wrapper that accepts positional arguments and
@@ -21,6 +21,13 @@ def ensure_forwardref_recursive_guard_default() -> None:
     current = getattr(ForwardRef, _PATCH_ATTR, False)
     if current:
         return
+    if sys.version_info < (3, 12, 4):
+        # 3.12.4 made ``recursive_guard`` keyword-only; older versions need no
+        # patch, so skip the introspection there.
+        setattr(ForwardRef, _PATCH_ATTR, True)
+        return
+
+    import inspect
 
     signature = inspect.signature(ForwardRef._evaluate)
     recursive_guard = signature.parameters.get("recursive_guard")
@@ -0,0 +1,39 @@
+"""Conditional request helpers (ETag / If-None-Match)."""
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag derived from the values that fully determine a response."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def cache_headers(etag: str, max_age: int) -> dict[str, str]:
+    # Responses are per user, so only private caches may store them.
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Authorization",
+    }
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function.
+    candidates = (candidate.strip().removeprefix("W/") for candidate in header.split(","))
+    return etag in candidates
+
+
+def not_modified_response(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+__all__ = ["cache_headers", "is_not_modified", "make_etag", "not_modified_response"]
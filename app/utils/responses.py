@@ -0,0 +1,57 @@
+"""JSON responses that bypass FastAPI's response-model pass.
+
+Returning a :class:`FastJSONResponse` from a path operation skips both the
+re-validation against ``response_model`` and ``jsonable_encoder``; the route
+keeps its ``response_model`` so the OpenAPI schema is unchanged. Callers are
+responsible for passing data that already matches that model.
+"""
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONResponse(Response):
+    """Serializes with orjson; ``bytes`` content is sent as is."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def dumps(value: Any) -> bytes:
+    """orjson encoding that also accepts (nested) pydantic models."""
+    # OPT_SERIALIZE_NUMPY makes orjson import numpy; until something else has
+    # imported it there cannot be any numpy values to serialize.
+    numpy = orjson.OPT_SERIALIZE_NUMPY if "numpy" in sys.modules else 0
+    return orjson.dumps(value, default=_default, option=_OPTIONS | numpy)
+
+
+def orm_fields(schema: type[BaseModel], obj: Any) -> dict[str, Any]:
+    """Read the fields of a flat ``orm_mode`` schema from ``obj`` without validation."""
+    return {name: getattr(obj, name) for name in _field_names(schema)}
+
+
+@lru_cache(maxsize=None)
+def _field_names(schema: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(schema.__fields__)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        # Field values only; nested models come back through this hook.
+        return value.__dict__
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+__all__ = ["FastJSONResponse", "dumps", "orm_fields"]
@@ -0,0 +1,44 @@
+"""Helpers for resolving a user's local calendar date."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+@lru_cache(maxsize=1024)
+def get_zone(name: Optional[str]) -> tzinfo:
+    """Return the ``ZoneInfo`` for ``name``, falling back to UTC."""
+    if not name:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def local_now(zone_name: Optional[str], now: Optional[datetime] = None) -> datetime:
+    return (now or utc_now()).astimezone(get_zone(zone_name))
+
+
+def local_today(zone_name: Optional[str], now: Optional[datetime] = None) -> date:
+    return local_now(zone_name, now).date()
+
+
+def seconds_until_local_midnight(zone_name: Optional[str], now: Optional[datetime] = None) -> int:
+    """Whole seconds from ``now`` until the next midnight in ``zone_name``."""
+    now = now or utc_now()
+    zone = get_zone(zone_name)
+    local = now.astimezone(zone)
+    midnight = datetime.combine(local.date() + timedelta(days=1), time(0), tzinfo=zone)
+    # Subtract in UTC so DST transitions are accounted for.
+    remaining = midnight.astimezone(timezone.utc) - now.astimezone(timezone.utc)
+    return max(int(remaining.total_seconds()), 0)
+
+
+__all__ = ["get_zone", "local_now", "local_today", "seconds_until_local_midnight", "utc_now"]
@@ -0,0 +1 @@
+"""Microbenchmarks and equivalence checks; see ``python -m benchmarks --help``."""
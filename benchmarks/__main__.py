@@ -0,0 +1,98 @@
+"""Run the equivalence checks and microbenchmarks against their budgets.
+
+Examples::
+
+    python -m benchmarks                      # checks, then budgets
+    python -m benchmarks --filter forecast --output bench.json
+    python -m benchmarks --time-scale 2       # slower CI machine
+    python -m benchmarks --update-budgets     # after an intended change
+
+Budgets live in ``benchmarks/budgets.json`` (see :mod:`benchmarks.runner`).
+The exit status is 1 when an equivalence check fails or a budget is
+exceeded. ``python -m pytest tests/test_benchmarks.py`` runs the same checks
+and budgets as tests.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from .cases import CASES, SEED
+from .equivalence import run_checks
+from .runner import (
+    BUDGETS,
+    calibration,
+    load_budgets,
+    measure_time,
+    over_budget,
+    run_case,
+    significant,
+    updated_budgets,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply every time budget (noisy runners)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="minimum duration of one repeat")
+    parser.add_argument("--check-count", type=int, default=2000, help="random inputs per equivalence check")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--skip-checks", action="store_true")
+    parser.add_argument("--checks-only", action="store_true")
+    parser.add_argument("--update-budgets", action="store_true", help="rewrite budgets from this run")
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    failed = False
+
+    if not args.skip_checks:
+        for name, messages in run_checks(args.seed, args.check_count).items():
+            print(f"check {name:<24}{'FAIL' if messages else 'ok'}")
+            for message in messages:
+                print(f"    {message}")
+            failed = failed or bool(messages)
+        if args.checks_only:
+            return int(failed)
+
+    budgets = load_budgets(args.budgets)
+    results: dict[str, dict[str, Any]] = {}
+    unit = measure_time(calibration, args.repeat, args.min_seconds)
+    print(f"\ncalibration: {unit * 1e6:.1f} us per unit")
+    print(f"{'case':<36}{'us/call':>12}{'ns/item':>10}{'peak KiB':>11}{'ratio':>11}{'budget':>11}  status")
+    for case in CASES:
+        if args.filter not in case.name:
+            continue
+        result = results[case.name] = run_case(case, unit, args.repeat, args.min_seconds)
+        budget = budgets.get(case.name)
+        status = "no budget"
+        if budget:
+            over = over_budget(result, budget, args.time_scale)
+            status = "OVER " + "+".join(over) if over else "ok"
+            failed = failed or bool(over)
+        print(
+            f"{case.name:<36}{result['us_per_call']:>12}{result['ns_per_item']:>10}{result['peak_kib']:>11}"
+            f"{result['ratio']:>11}{significant(budget['max_ratio'] * args.time_scale) if budget else '-':>11}  {status}"
+        )
+
+    if args.output is not None:
+        output = {"calibration_us": round(unit * 1e6, 3), "cases": results}
+        args.output.write_text(json.dumps(output, indent=2) + "\n")
+    if args.update_budgets:
+        budgets.update(updated_budgets(results))
+        args.budgets.write_text(json.dumps(budgets, indent=2, sort_keys=True) + "\n")
+        print(f"Updated {args.budgets}")
+        return 0
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Benchmark cases for the card_science hot paths and response schemas.
+
+Each case builds its inputs once and returns a zero-argument callable; the
+``size`` is the number of birthdays (or pairs) one call processes.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable
+
+from app.schemas import ForecastResponse
+from app.services import card_science as cs
+from app.services.forecast_json import forecast_json, today_card_index
+
+AS_OF = date(2026, 10, 17)
+BULK = 10_000
+SEED = 20261017
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    size: int
+    setup: Callable[[], Callable[[], Any]]
+
+
+def birthdays(count: int, seed: int = SEED) -> list[date]:
+    rng = random.Random(seed)
+    first, last = date(1950, 1, 1).toordinal(), date(2010, 12, 31).toordinal()
+    return [date.fromordinal(rng.randint(first, last)) for _ in range(count)]
+
+
+BIRTHDAY = date(1990, 5, 17)
+PARTNER = date(1988, 11, 3)
+
+
+def _bulk(func: Callable[..., Any], count: int = BULK, **kwargs: Any) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        values = birthdays(count)
+        return lambda: [func(value, **kwargs) for value in values]
+
+    return setup
+
+
+def _pairs(func: Callable[[date, date], Any]) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        pairs = list(zip(birthdays(BULK), birthdays(BULK, SEED + 1)))
+        return lambda: [func(primary, partner) for primary, partner in pairs]
+
+    return setup
+
+
+def _batch(func: Callable[..., Any], *args: Any) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        values = birthdays(BULK)
+        return lambda: func(values, *args)
+
+    return setup
+
+
+def _matrix() -> Callable[[], Any]:
+    # 100 x 100 pairs.
+    values = birthdays(100)
+    return lambda: cs.compatibility_matrix(values, values)
+
+
+def _rank() -> Callable[[], Any]:
+    values = birthdays(BULK)
+    return lambda: cs.rank_partners(BIRTHDAY, values, 20)
+
+
+def _forecast_response() -> ForecastResponse:
+    return ForecastResponse(
+        personal_blueprint=cs.derive_personal_blueprint(BIRTHDAY),
+        yearly_cycles=cs.build_yearly_cycles(BIRTHDAY, as_of=AS_OF),
+        today_card=cs.draw_today_card(BIRTHDAY, as_of=AS_OF),
+    )
+
+
+def _forecast_fast_path() -> bytes:
+    return forecast_json(BIRTHDAY, AS_OF, cs.cycle_card_indices(BIRTHDAY), today_card_index(BIRTHDAY, AS_OF))
+
+
+CASES: list[Case] = [
+    Case("derive_personal_blueprint/scalar", 1, lambda: lambda: cs.derive_personal_blueprint(BIRTHDAY)),
+    Case("derive_personal_blueprint/bulk", BULK, _bulk(cs.derive_personal_blueprint)),
+    Case("personal_blueprint_json/scalar", 1, lambda: lambda: cs.personal_blueprint_json(BIRTHDAY)),
+    Case("birthday_batch/bulk", BULK, _batch(cs.birthday_batch)),
+    Case("batch_blueprint_indices/bulk", BULK, _batch(cs.batch_blueprint_indices)),
+    Case("build_yearly_cycles/scalar", 1, lambda: lambda: cs.build_yearly_cycles(BIRTHDAY, as_of=AS_OF)),
+    Case("build_yearly_cycles/bulk", 1000, _bulk(cs.build_yearly_cycles, 1000, as_of=AS_OF)),
+    Case("batch_cycle_card_indices/bulk", BULK, _batch(cs.batch_cycle_card_indices)),
+    Case("draw_today_card/scalar", 1, lambda: lambda: cs.draw_today_card(BIRTHDAY, as_of=AS_OF)),
+    Case("draw_today_card/bulk", BULK, _bulk(cs.draw_today_card, as_of=AS_OF)),
+    Case("batch_today_card_indices/bulk", BULK, _batch(cs.batch_today_card_indices, AS_OF)),
+    Case("compatibility_score/scalar", 1, lambda: lambda: cs.compatibility_score(BIRTHDAY, PARTNER)),
+    Case("compatibility_score/bulk", BULK, _pairs(cs.compatibility_score)),
+    Case("compatibility_lessons/scalar", 1, lambda: lambda: cs.compatibility_lessons(BIRTHDAY, PARTNER)),
+    Case("compatibility_lessons/bulk", BULK, _pairs(cs.compatibility_lessons)),
+    Case("rotate/scalar", 1, lambda: lambda: cs.rotate(cs.COMPATIBILITY_LESSONS, 3)),
+    Case("compatibility_matrix/bulk", BULK, _matrix),
+    Case("rank_partners/bulk", BULK, _rank),
+    Case("ForecastResponse/scalar", 1, lambda: _forecast_response),
+    Case("ForecastResponse.json/scalar", 1, lambda: lambda: _forecast_response().json()),
+    Case("forecast_fast_path/scalar", 1, lambda: _forecast_fast_path),
+]
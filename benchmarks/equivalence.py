@@ -0,0 +1,195 @@
+"""Property checks: optimized and batched paths against the scalar reference.
+
+Birthdays are drawn from a seeded generator and always include the edge
+dates (1 January, 29 February, 31 December of leap and common years), so a
+failure is reproducible from the seed alone.
+"""
+from __future__ import annotations
+
+import calendar
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from app.schemas import ForecastResponse
+from app.services import card_science as cs
+from app.services.forecast_json import forecast_json, today_card_index
+from app.utils.responses import dumps
+
+EDGE_DATES = [
+    date(2000, 1, 1), date(2000, 2, 29), date(2000, 12, 31),
+    date(2001, 1, 1), date(2001, 2, 28), date(2001, 12, 31),
+    date(1900, 3, 1), date(2004, 2, 29),
+]
+
+
+def sample_dates(rng: random.Random, count: int) -> list[date]:
+    first, last = date(1900, 1, 1).toordinal(), date(2030, 12, 31).toordinal()
+    return EDGE_DATES + [date.fromordinal(rng.randint(first, last)) for _ in range(count)]
+
+
+def check_blueprints(rng: random.Random, count: int) -> Iterator[str]:
+    days = sample_dates(rng, count)
+    indices = cs.batch_blueprint_indices(days)
+    for row, birthday in enumerate(days):
+        reference = cs._build_personal_blueprint(birthday)
+        if cs.derive_personal_blueprint(birthday) != reference:
+            yield f"derive_personal_blueprint({birthday}) differs from the reference"
+        if json.loads(cs.personal_blueprint_json(birthday)) != json.loads(reference.json()):
+            yield f"personal_blueprint_json({birthday}) differs from the reference"
+        if cs.card_insight("生命牌", indices.life[row]) != reference.life_card:
+            yield f"batch_blueprint_indices life card differs for {birthday}"
+        if cs.card_insight("守护牌", indices.ruling[row]) != reference.ruling_card:
+            yield f"batch_blueprint_indices ruling card differs for {birthday}"
+        if bool(indices.is_special_family[row]) != reference.is_special_family:
+            yield f"batch_blueprint_indices special family flag differs for {birthday}"
+        for title, soul, expected in (
+            ("灵魂资源牌", indices.soul_resource[row], reference.soul_resource_card),
+            ("灵魂挑战牌", indices.soul_challenge[row], reference.soul_challenge_card),
+        ):
+            if (soul < 0) != (expected is None) or (expected and cs.card_insight(title, soul) != expected):
+                yield f"batch_blueprint_indices {title} differs for {birthday}"
+
+
+def check_birthday_inputs(rng: random.Random, count: int) -> Iterator[str]:
+    days = sample_dates(rng, count)
+    reference = cs.birthday_batch(days)
+    inputs = {
+        "datetime": [datetime.combine(day, time(23, 59)) for day in days],
+        "ordinals": [day.toordinal() for day in days],
+        "datetime64": np.array(days, dtype="datetime64[D]"),
+    }
+    for name, values in inputs.items():
+        batch = cs.birthday_batch(values)
+        for field in ("ordinals", "day_of_year", "is_leap"):
+            if not np.array_equal(getattr(batch, field), getattr(reference, field)):
+                yield f"birthday_batch({name}) {field} differs from dates"
+    for row, birthday in enumerate(days):
+        if reference.day_of_year[row] != birthday.timetuple().tm_yday:
+            yield f"birthday_batch day_of_year differs for {birthday}"
+        if bool(reference.is_leap[row]) != calendar.isleap(birthday.year):
+            yield f"birthday_batch is_leap differs for {birthday}"
+
+
+def check_today_cards(rng: random.Random, count: int) -> Iterator[str]:
+    days = sample_dates(rng, count)
+    as_of = [birthday + timedelta(days=rng.randint(0, 40_000)) for birthday in days]
+    indices, _ = cs.batch_today_card_indices(days, as_of)
+    for row, birthday in enumerate(days):
+        reference = cs.draw_today_card(birthday, as_of=as_of[row])
+        if cs.card_insight("今日牌", indices[row]) != reference:
+            yield f"batch_today_card_indices differs for {birthday} as of {as_of[row]}"
+
+
+def check_cycles(rng: random.Random, count: int) -> Iterator[str]:
+    days = sample_dates(rng, count)
+    cards, _ = cs.batch_cycle_card_indices(days)
+    as_of = [date(rng.randint(2000, 2030), 1, 1) + timedelta(days=rng.randint(0, 364)) for _ in days]
+    positions, day_in_cycle = cs.batch_cycle_positions(days, as_of)
+    for row, birthday in enumerate(days):
+        try:
+            reference = cs.build_yearly_cycles(birthday, as_of=as_of[row])
+        except ValueError:
+            # 29 February in a common year has no cycles.
+            if positions[row] != 0:
+                yield f"batch_cycle_positions found a cycle for {birthday} in {as_of[row].year}"
+            continue
+        themes = [f"{cs.DECK[int(index)].name} 的周期主题" for index in cards[row]]
+        if themes != [cycle.theme for cycle in reference]:
+            yield f"batch_cycle_card_indices differs for {birthday}"
+        if cs.cycle_card_indices(birthday) != [int(index) for index in cards[row]]:
+            yield f"cycle_card_indices differs for {birthday}"
+        expected = _reference_position(reference, as_of[row])
+        if (int(positions[row]), int(day_in_cycle[row])) != expected:
+            yield f"batch_cycle_positions differs for {birthday} as of {as_of[row]}"
+
+
+def _reference_position(cycles, as_of: date) -> tuple[int, int]:
+    for cycle in cycles:
+        if cycle.cycle_start <= as_of <= cycle.cycle_end:
+            return cycle.cycle_index, (as_of - cycle.cycle_start).days
+    return 0, 0
+
+
+def check_compatibility(rng: random.Random, count: int) -> Iterator[str]:
+    primaries = sample_dates(rng, count // 10)
+    partners = sample_dates(rng, count // 10)
+    matrix = cs.compatibility_matrix(primaries, partners)
+    for row, primary in enumerate(primaries):
+        for column, partner in enumerate(partners):
+            if int(matrix.scores[row, column]) != cs.compatibility_score(primary, partner):
+                yield f"compatibility_matrix score differs for {primary}, {partner}"
+            if matrix.lessons(row, column) != cs.compatibility_lessons(primary, partner):
+                yield f"compatibility_matrix lessons differ for {primary}, {partner}"
+            if matrix.theme(row, column) != cs.build_compatibility_theme(primary, partner):
+                yield f"compatibility_matrix theme differs for {primary}, {partner}"
+
+
+def check_rotate(rng: random.Random, count: int) -> Iterator[str]:
+    for _ in range(count):
+        items = [str(value) for value in range(rng.randint(0, 8))]
+        offset = rng.randint(-20, 20)
+        expected = [items[(position + offset) % len(items)] for position in range(len(items))] if items else []
+        if cs.rotate(items, offset) != expected:
+            yield f"rotate({items}, {offset}) is not a rotation"
+
+
+def check_rank_partners(rng: random.Random, count: int) -> Iterator[str]:
+    for _ in range(max(count // 100, 1)):
+        primary = rng.choice(sample_dates(rng, 1))
+        candidates = sample_dates(rng, rng.randint(1, 300))
+        limit, offset = rng.randint(1, 50), rng.randint(0, 50)
+        positions, _ = cs.rank_partners(primary, candidates, limit, offset)
+        ordered = sorted(
+            range(len(candidates)), key=lambda index: (-cs.compatibility_score(primary, candidates[index]), index)
+        )
+        if [int(position) for position in positions] != ordered[offset : offset + limit]:
+            yield f"rank_partners differs for {primary} (limit={limit}, offset={offset})"
+
+
+def check_forecast_serialization(rng: random.Random, count: int) -> Iterator[str]:
+    for birthday in sample_dates(rng, count // 10):
+        as_of = birthday + timedelta(days=rng.randint(0, 30_000))
+        try:
+            reference = ForecastResponse(
+                personal_blueprint=cs.derive_personal_blueprint(birthday),
+                yearly_cycles=cs.build_yearly_cycles(birthday, as_of=as_of),
+                today_card=cs.draw_today_card(birthday, as_of=as_of),
+            )
+        except ValueError:
+            continue
+        fast = forecast_json(birthday, as_of, cs.cycle_card_indices(birthday), today_card_index(birthday, as_of))
+        if json.loads(fast) != json.loads(reference.json()):
+            yield f"forecast fast path differs for {birthday} as of {as_of}"
+        if json.loads(dumps(reference)) != json.loads(reference.json()):
+            yield f"orjson serialization of ForecastResponse differs for {birthday}"
+
+
+CHECKS: dict[str, Callable[[random.Random, int], Iterator[str]]] = {
+    "birthday_inputs": check_birthday_inputs,
+    "blueprints": check_blueprints,
+    "today_cards": check_today_cards,
+    "cycles": check_cycles,
+    "compatibility": check_compatibility,
+    "rotate": check_rotate,
+    "rank_partners": check_rank_partners,
+    "forecast_serialization": check_forecast_serialization,
+}
+
+
+def run_check(name: str, seed: int, count: int, limit: Optional[int] = 20) -> list[str]:
+    """Run one check; returns up to ``limit`` failure messages."""
+    messages: list[str] = []
+    for message in CHECKS[name](random.Random(f"{seed}:{name}"), count):
+        messages.append(message)
+        if limit is not None and len(messages) >= limit:
+            break
+    return messages
+
+
+def run_checks(seed: int, count: int, limit: Optional[int] = 20) -> dict[str, list[str]]:
+    """Run every check; returns up to ``limit`` failure messages per check."""
+    return {name: run_check(name, seed, count, limit) for name in CHECKS}
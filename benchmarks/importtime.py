@@ -0,0 +1,130 @@
+"""Report what ``import app.main`` costs and how long a cold start takes.
+
+Examples::
+
+    python -m benchmarks.importtime                  # import report + first request
+    python -m benchmarks.importtime --top 30 --skip-server
+    python -m benchmarks.importtime --max-seconds 1  # exit 1 when slower
+
+The import report comes from ``python -X importtime`` in a fresh interpreter.
+Time to first request is measured from spawning uvicorn until ``/health``
+answers; point ``DATABASE_URL`` at a migrated database so it reflects a
+production boot.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass
+
+TARGET = "app.main"
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.importtime", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--module", default=TARGET, help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--skip-server", action="store_true", help="only report import time")
+    parser.add_argument("--max-seconds", type=float, help="fail when the first request takes longer")
+    return parser.parse_args()
+
+
+def parse_importtime(stderr: str) -> list[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def measure_imports(module: str) -> tuple[float, list[ImportRecord]]:
+    started_at = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - started_at, parse_importtime(result.stderr)
+
+
+def by_package(records: list[ImportRecord]) -> list[tuple[str, int]]:
+    totals: dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def measure_first_request(timeout: float = 30.0) -> float:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/health"
+    started_at = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        while time.perf_counter() - started_at < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before answering")
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started_at
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("uvicorn did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    args = parse_args()
+    wall, records = measure_imports(args.module)
+    total_us = sum(record.self_us for record in records)
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall, {total_us / 1000:.0f} ms in imports")
+
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for package, self_us in by_package(records)[: args.top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}")
+
+    print(f"\n{'module':<48}{'cumulative ms':>14}")
+    slowest = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+    for record in slowest[: args.top]:
+        print(f"{record.module:<48}{record.cumulative_us / 1000:>14.1f}")
+
+    if args.skip_server:
+        return 0
+    first_request = measure_first_request()
+    print(f"\ntime to first request: {first_request * 1000:.0f} ms")
+    if args.max_seconds is not None and first_request > args.max_seconds:
+        print(f"FAIL: slower than {args.max_seconds:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Timing, memory tracing and budget comparison shared by the CLI and tests.
+
+Budgets live in ``benchmarks/budgets.json``: per case, the best time per
+call as a multiple of a calibration loop timed in the same process, and the
+peak traced allocation per call in KiB. Relative times keep one budget file
+usable across machines.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from .cases import Case
+
+BUDGETS = Path(__file__).with_name("budgets.json")
+# Headroom applied by --update-budgets so noise does not fail runs.
+TIME_HEADROOM = 3.0
+MEMORY_HEADROOM = 1.5
+CALIBRATION_SIZE = 10_000
+
+
+def calibration() -> int:
+    """Fixed interpreter-bound work that every case time is divided by."""
+    return sum(len(str(number)) for number in range(CALIBRATION_SIZE))
+
+
+def significant(value: float) -> float:
+    # Ratios span several orders of magnitude; keep four significant digits.
+    return float(f"{value:.4g}")
+
+
+def measure_time(func: Callable[[], Any], repeat: int, min_seconds: float) -> float:
+    """Best seconds per call over ``repeat`` timed loops."""
+    func()
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_seconds:
+            break
+        number *= 2 if elapsed <= 0 else max(2, int(min_seconds / elapsed) + 1)
+    best = elapsed / number
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat - 1):
+            started_at = time.perf_counter()
+            for _ in range(number):
+                func()
+            best = min(best, (time.perf_counter() - started_at) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def measure_memory(func: Callable[[], Any]) -> tuple[int, int]:
+    """Peak and retained traced bytes of one (warm) call."""
+    func()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return peak - baseline, current - baseline
+
+
+def run_case(case: Case, unit: float, repeat: int = 5, min_seconds: float = 0.05) -> dict[str, Any]:
+    """Time and trace ``case``; ``unit`` is the calibration time in seconds."""
+    func = case.setup()
+    seconds = measure_time(func, repeat, min_seconds)
+    peak, retained = measure_memory(func)
+    return {
+        "size": case.size,
+        "us_per_call": round(seconds * 1e6, 3),
+        "ratio": significant(seconds / unit),
+        "ns_per_item": round(seconds * 1e9 / case.size, 1),
+        "peak_kib": round(peak / 1024, 2),
+        "retained_kib": round(retained / 1024, 2),
+    }
+
+
+def load_budgets(path: Path = BUDGETS) -> dict[str, dict[str, float]]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def over_budget(result: dict[str, Any], budget: dict[str, float], time_scale: float = 1.0) -> list[str]:
+    """Names of the budgets (``time``, ``memory``) that ``result`` exceeds."""
+    over = []
+    if result["ratio"] > budget["max_ratio"] * time_scale:
+        over.append("time")
+    if result["peak_kib"] > budget["max_peak_kib"]:
+        over.append("memory")
+    return over
+
+
+def updated_budgets(results: dict[str, dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """Budgets for ``results`` with headroom for noise."""
+    return {
+        name: {
+            "max_ratio": significant(result["ratio"] * TIME_HEADROOM),
+            "max_peak_kib": round(max(result["peak_kib"], 1.0) * MEMORY_HEADROOM, 1),
+        }
+        for name, result in results.items()
+    }
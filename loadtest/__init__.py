@@ -0,0 +1 @@
+"""End-to-end load harness; see ``python -m loadtest --help``."""
@@ -0,0 +1,145 @@
+"""Seed a database, start uvicorn and replay a workload profile.
+
+Examples::
+
+    python -m loadtest --profile mixed --users 2000 --output results.json
+    python -m loadtest --profile read_heavy --save-baseline read_heavy.json  # before a change
+    python -m loadtest --profile read_heavy --baseline read_heavy.json       # after it
+    python -m loadtest --database-url postgresql://... --skip-seed --workers 4
+
+The exit status is 1 when ``--baseline`` is given and any metric regressed
+by more than ``--tolerance``. Baselines hold absolute latencies and
+throughput, so record them on the machine that runs the comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import httpx
+
+from .profiles import PROFILES
+from .runner import compare, format_table, run_workload
+from .seed import population, seed_database, seed_via_api
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--users", type=int, help="override the profile's population size")
+    parser.add_argument("--concurrency", type=int, help="override the profile's virtual clients")
+    parser.add_argument("--duration", type=float, help="measured seconds")
+    parser.add_argument("--warmup", type=float, help="unmeasured seconds before measuring")
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file in a temporary directory")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse users seeded by an earlier run")
+    parser.add_argument("--seed-via-api", action="store_true", help="register users through the API")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    parser.add_argument("--baseline", type=Path, help="compare against these JSON results")
+    parser.add_argument("--save-baseline", type=Path, help="also store the results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression, as a fraction")
+    args = parser.parse_args()
+    if args.skip_seed and not args.database_url:
+        parser.error("--skip-seed needs --database-url; the default database is created empty")
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    profile = PROFILES[args.profile]
+    profile = replace(
+        profile,
+        users=args.users or profile.users,
+        concurrency=args.concurrency or profile.concurrency,
+        duration=args.duration if args.duration is not None else profile.duration,
+        warmup=args.warmup if args.warmup is not None else profile.warmup,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{workdir}/loadtest.db"
+        env = {**os.environ, "DATABASE_URL": database_url, "PYTHONPATH": str(ROOT)}
+        os.environ["DATABASE_URL"] = database_url
+        seeded = population(profile, profile.users)
+
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True)
+        if not args.skip_seed and not args.seed_via_api:
+            asyncio.run(seed_database(profile, seeded))
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            cwd=ROOT,
+            env=env,
+        )
+        try:
+            _wait_until_healthy(base_url, server)
+            if not args.skip_seed and args.seed_via_api:
+                asyncio.run(_seed_via_api(base_url, profile, seeded))
+            results = asyncio.run(
+                run_workload(base_url, profile, seeded, profile.concurrency, profile.duration, profile.warmup)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results["database"] = database_url.split("://", 1)[0]
+    results["workers"] = args.workers
+    print(format_table(results))
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+async def _seed_via_api(base_url: str, profile, seeded) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        await seed_via_api(client, profile, seeded)
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_healthy(base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited before becoming healthy")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Reproducible workload profiles.
+
+A profile fixes the seeded population and the weighted operation mix; with
+the same seed, every virtual client issues the same sequence of requests.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Optional
+
+# (method, path, JSON body)
+Request = tuple[str, str, Optional[dict[str, Any]]]
+
+_FIRST_BIRTHDAY = date(1950, 1, 1).toordinal()
+_LAST_BIRTHDAY = date(2010, 12, 31).toordinal()
+
+
+def random_birth_date(rng: random.Random) -> date:
+    return date.fromordinal(rng.randint(_FIRST_BIRTHDAY, _LAST_BIRTHDAY))
+
+
+@dataclass(frozen=True)
+class Operation:
+    name: str
+    # Whether the operation needs a premium account to succeed.
+    premium: bool
+    build: Callable[[random.Random], Request]
+
+
+def _compatibility(rng: random.Random) -> Request:
+    body = {"partner_birth_date": random_birth_date(rng).isoformat()}
+    return "POST", "/api/insights/compatibility", body
+
+
+OPERATIONS: dict[str, Operation] = {
+    operation.name: operation
+    for operation in (
+        Operation("login", False, lambda rng: ("POST", "/api/auth/login/json", None)),
+        Operation("personal", False, lambda rng: ("GET", "/api/insights/personal", None)),
+        Operation("forecast", True, lambda rng: ("GET", "/api/insights/forecast", None)),
+        Operation("today", True, lambda rng: ("GET", "/api/insights/today", None)),
+        Operation("compatibility", True, _compatibility),
+        Operation("dashboard", False, lambda rng: ("GET", "/dashboard", None)),
+    )
+}
+
+
+@dataclass(frozen=True)
+class WorkloadProfile:
+    name: str
+    weights: dict[str, int]
+    description: str = ""
+    users: int = 1000
+    premium_ratio: float = 0.5
+    concurrency: int = 32
+    duration: float = 30.0
+    warmup: float = 3.0
+    seed: int = 20261017
+
+
+PROFILES: dict[str, WorkloadProfile] = {
+    profile.name: profile
+    for profile in (
+        WorkloadProfile(
+            "mixed",
+            {"login": 5, "personal": 30, "forecast": 25, "today": 20, "compatibility": 10, "dashboard": 10},
+            "Typical day: mostly insight reads, occasional logins.",
+        ),
+        WorkloadProfile(
+            "read_heavy",
+            {"personal": 40, "forecast": 40, "today": 20},
+            "Cached insight endpoints only; isolates serialization and auth caching.",
+            premium_ratio=1.0,
+        ),
+        WorkloadProfile(
+            "login_storm",
+            {"login": 80, "personal": 20},
+            "Morning peak of logins; dominated by bcrypt.",
+            concurrency=16,
+        ),
+    )
+}
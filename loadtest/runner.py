@@ -0,0 +1,158 @@
+"""Replay a workload profile against a running server and summarise it."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+
+from .profiles import OPERATIONS, WorkloadProfile
+from .seed import SeededUser, login
+
+
+@dataclass
+class Recorder:
+    measure_from: float
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, operation: str, started_at: float, ok: bool) -> None:
+        if started_at < self.measure_from:
+            return
+        self.latencies[operation].append(time.perf_counter() - started_at)
+        if not ok:
+            self.errors[operation] += 1
+
+
+@dataclass
+class _Session:
+    user: SeededUser
+    token: Optional[str] = None
+
+
+async def run_workload(
+    base_url: str,
+    profile: WorkloadProfile,
+    seeded: list[SeededUser],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> dict[str, Any]:
+    premium = [user for user in seeded if user.premium] or seeded
+    free = [user for user in seeded if not user.premium] or seeded
+    names = list(profile.weights)
+    weights = [profile.weights[name] for name in names]
+
+    started = time.perf_counter()
+    recorder = Recorder(measure_from=started + warmup)
+    deadline = recorder.measure_from + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def virtual_client(index: int) -> None:
+            rng = random.Random(profile.seed + 100 + index)
+            sessions = {True: _Session(rng.choice(premium)), False: _Session(rng.choice(free))}
+            while time.perf_counter() < deadline:
+                operation = OPERATIONS[rng.choices(names, weights)[0]]
+                session = sessions[operation.premium]
+                method, path, body = operation.build(rng)
+                request_started = time.perf_counter()
+                try:
+                    if operation.name == "login":
+                        session.token = await login(client, session.user)
+                        ok = True
+                    else:
+                        if session.token is None:
+                            # First request of the session; not part of the mix.
+                            session.token = await login(client, session.user)
+                            request_started = time.perf_counter()
+                        response = await client.request(
+                            method, path, json=body, headers={"Authorization": f"Bearer {session.token}"}
+                        )
+                        ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                recorder.record(operation.name, request_started, ok)
+
+        await asyncio.gather(*(virtual_client(index) for index in range(concurrency)))
+
+    elapsed = time.perf_counter() - recorder.measure_from
+    operations = {
+        name: summarize(recorder.latencies[name], recorder.errors[name], elapsed)
+        for name in names
+        if recorder.latencies[name]
+    }
+    every_latency = [value for name in names for value in recorder.latencies[name]]
+    return {
+        "profile": profile.name,
+        "config": {
+            "users": len(seeded),
+            "concurrency": concurrency,
+            "duration": duration,
+            "warmup": warmup,
+            "seed": profile.seed,
+            "weights": profile.weights,
+        },
+        "elapsed": round(elapsed, 3),
+        "totals": summarize(every_latency, sum(recorder.errors.values()), elapsed),
+        "operations": operations,
+    }
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": _percentile_ms(ordered, 0.50),
+        "p95_ms": _percentile_ms(ordered, 0.95),
+        "p99_ms": _percentile_ms(ordered, 0.99),
+    }
+
+
+def _percentile_ms(ordered: list[float], quantile: float) -> float:
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile.
+    rank = max(int(quantile * len(ordered) + 0.999999) - 1, 0)
+    return round(ordered[min(rank, len(ordered) - 1)] * 1000, 3)
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Describe every metric that got worse than ``baseline`` by more than
+    ``tolerance`` (a fraction)."""
+    regressions: list[str] = []
+    sections = {"totals": (results["totals"], baseline.get("totals"))}
+    for name, current in results["operations"].items():
+        sections[name] = (current, baseline.get("operations", {}).get(name))
+
+    for name, (current, reference) in sections.items():
+        if not reference:
+            continue
+        if current["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {reference['rps']} -> {current['rps']}")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {reference[key]} -> {current[key]}")
+        if current["error_rate"] > reference["error_rate"] + 0.01:
+            regressions.append(f"{name}: error_rate {reference['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def format_table(results: dict[str, Any]) -> str:
+    header = f"{'operation':<14}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}"
+    rows = [header, "-" * len(header)]
+    for name, summary in [*results["operations"].items(), ("TOTAL", results["totals"])]:
+        rows.append(
+            f"{name:<14}{summary['requests']:>10}{summary['rps']:>10}{summary['p50_ms']:>10}"
+            f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}{summary['error_rate']:>9.2%}"
+        )
+    return "\n".join(rows)
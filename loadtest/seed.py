@@ -0,0 +1,93 @@
+"""Seed the population of a workload profile."""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime
+
+import httpx
+
+from .profiles import WorkloadProfile, random_birth_date
+
+PASSWORD = "loadtest-password"
+INSERT_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class SeededUser:
+    email: str
+    premium: bool
+
+
+def population(profile: WorkloadProfile, users: int) -> list[SeededUser]:
+    rng = random.Random(profile.seed)
+    return [
+        SeededUser(f"loadtest-{index}@example.com", rng.random() < profile.premium_ratio)
+        for index in range(users)
+    ]
+
+
+async def seed_database(profile: WorkloadProfile, seeded: list[SeededUser]) -> None:
+    """Bulk insert users with one shared password hash.
+
+    Imports the application, so ``DATABASE_URL`` must already point at the
+    target database.
+    """
+    from app.core.security import get_password_hash
+    from app.database import async_session_factory, dispose_engines
+    from app.models import BirthProfile, EmailPreference, SubscriptionPlan, User
+
+    rng = random.Random(profile.seed + 1)
+    hashed_password = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    try:
+        for start in range(0, len(seeded), INSERT_CHUNK):
+            async with async_session_factory() as session:
+                session.add_all(
+                    User(
+                        email=user.email,
+                        hashed_password=hashed_password,
+                        full_name=f"Load Test {start + offset}",
+                        subscription_plan=SubscriptionPlan.PREMIUM if user.premium else SubscriptionPlan.FREE,
+                        created_at=now,
+                        profile=BirthProfile(birth_date=random_birth_date(rng), timezone="UTC"),
+                        email_preferences=EmailPreference(),
+                    )
+                    for offset, user in enumerate(seeded[start : start + INSERT_CHUNK])
+                )
+                await session.commit()
+    finally:
+        await dispose_engines()
+
+
+async def seed_via_api(
+    client: httpx.AsyncClient, profile: WorkloadProfile, seeded: list[SeededUser]
+) -> None:
+    """Register every user through ``POST /api/auth/register``; slow, as each
+    registration hashes its password."""
+    rng = random.Random(profile.seed + 1)
+    for user in seeded:
+        response = await client.post(
+            "/api/auth/register",
+            json={
+                "email": user.email,
+                "password": PASSWORD,
+                "birth_date": random_birth_date(rng).isoformat(),
+                "timezone": "UTC",
+            },
+        )
+        response.raise_for_status()
+        if user.premium:
+            token = await login(client, user)
+            response = await client.post(
+                "/api/users/me/subscription",
+                json={"plan": "premium"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            response.raise_for_status()
+
+
+async def login(client: httpx.AsyncClient, user: SeededUser) -> str:
+    response = await client.post("/api/auth/login/json", json={"email": user.email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
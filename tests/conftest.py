@@ -0,0 +1,12 @@
+"""Shared test setup.
+
+Tests build their own engines on SQLite files under ``tmp_path``; the
+process-wide engine in :mod:`app.database` points at an in-memory database
+so importing the app never touches ``card_science.db``.
+"""
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("DATABASE_REPLICA_URLS", "[]")
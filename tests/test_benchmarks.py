@@ -0,0 +1,40 @@
+"""``python -m benchmarks`` as tests: equivalence checks, then budgets.
+
+Set ``BENCHMARKS_TIME_SCALE`` (the CLI's ``--time-scale``) on slow or noisy
+runners, or deselect the budgets with ``-k "not budget"``.
+"""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from benchmarks.cases import CASES, SEED
+from benchmarks.equivalence import CHECKS, run_check
+from benchmarks.runner import calibration, load_budgets, measure_time, over_budget, run_case
+
+CHECK_COUNT = 2000
+TIME_SCALE = float(os.environ.get("BENCHMARKS_TIME_SCALE", "1"))
+BUDGETS = load_budgets()
+
+
+@pytest.mark.parametrize("name", CHECKS)
+def test_matches_reference(name):
+    assert run_check(name, SEED, CHECK_COUNT) == []
+
+
+@pytest.fixture(scope="module")
+def unit() -> float:
+    return measure_time(calibration, repeat=5, min_seconds=0.05)
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_within_budget(case, unit):
+    budget = BUDGETS.get(case.name)
+    if budget is None:
+        pytest.skip("no budget; run python -m benchmarks --update-budgets")
+    result = run_case(case, unit)
+    assert over_budget(result, budget, TIME_SCALE) == [], (
+        f"ratio {result['ratio']} (budget {budget['max_ratio'] * TIME_SCALE}), "
+        f"peak {result['peak_kib']} KiB (budget {budget['max_peak_kib']} KiB)"
+    )
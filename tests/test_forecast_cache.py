@@ -0,0 +1,97 @@
+"""FileForecastBackend expiry, corruption handling and shared keys."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import date
+
+import pytest
+
+from app.services import forecast_cache as forecast_cache_module
+from app.services.forecast_cache import FileForecastBackend, ForecastCache
+
+BIRTHDAY = date(1990, 4, 12)
+TODAY = date(2026, 10, 17)
+
+
+def test_sweep_removes_expired_entries(tmp_path):
+    backend = FileForecastBackend(str(tmp_path))
+
+    async def scenario() -> None:
+        await backend.set("expired", b"old", ttl=-1)
+        await backend.set("fresh", b"new", ttl=60)
+
+    asyncio.run(scenario())
+    abandoned = tmp_path / ".tmp-abandoned"
+    abandoned.write_bytes(b"partial")
+    stale = time.time() - 2 * backend.sweep_interval
+    os.utime(abandoned, (stale, stale))
+    (tmp_path / ".tmp-in-progress").write_bytes(b"partial")
+
+    assert backend.sweep() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == [".tmp-in-progress", "fresh"]
+
+
+def test_set_sweeps_once_the_interval_has_passed(tmp_path):
+    backend = FileForecastBackend(str(tmp_path), sweep_interval=0)
+
+    async def scenario() -> None:
+        await backend.set("expired", b"old", ttl=-1)
+        await backend.set("fresh", b"new", ttl=60)
+
+    asyncio.run(scenario())
+    assert [path.name for path in tmp_path.iterdir()] == ["fresh"]
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    backend = FileForecastBackend(str(tmp_path))
+
+    async def scenario() -> None:
+        await backend.set("key", b"value", ttl=-1)
+        assert await backend.get("key") is None
+
+    asyncio.run(scenario())
+    assert not (tmp_path / "key").exists()
+
+
+@pytest.mark.parametrize("length", [0, 3, 9])
+def test_truncated_file_is_a_miss(tmp_path, length):
+    backend = FileForecastBackend(str(tmp_path))
+    path = tmp_path / "key"
+
+    async def scenario() -> None:
+        await backend.set("key", b"value", ttl=60)
+        assert await backend.get("key") == b"value"
+        path.write_bytes(path.read_bytes()[:length])
+        assert await backend.get("key") is None
+
+    asyncio.run(scenario())
+    assert not path.exists()
+
+
+def test_corrupt_header_is_a_miss(tmp_path):
+    backend = FileForecastBackend(str(tmp_path))
+    (tmp_path / "key").write_bytes(b"not-a-timestamp\nvalue")
+
+    assert asyncio.run(backend.get("key")) is None
+    assert not (tmp_path / "key").exists()
+
+
+def test_shared_key_follows_date_and_deck_version(tmp_path, monkeypatch):
+    backend = FileForecastBackend(str(tmp_path))
+
+    def fetch(as_of: date) -> bytes:
+        # A fresh ForecastCache has an empty local LRU, so hits come from the files.
+        cache = ForecastCache(maxsize=8, backend=backend)
+        value = asyncio.run(cache.get_or_build(BIRTHDAY, as_of, 60, lambda: b"built"))
+        assert value == b"built"
+        return cache.builds
+
+    assert fetch(TODAY) == 1
+    assert fetch(TODAY) == 0
+    assert fetch(date(2026, 10, 18)) == 1
+
+    monkeypatch.setattr(forecast_cache_module, "DECK_VERSION", "next-deck")
+    assert fetch(TODAY) == 1
+    assert len(list(tmp_path.iterdir())) == 3
@@ -0,0 +1,251 @@
+"""OutboxWorker delivering to a local aiosmtpd server."""
+from __future__ import annotations
+
+import asyncio
+import socket
+from datetime import datetime, timedelta
+from email import message_from_bytes
+from email.message import Message
+from pathlib import Path
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from app.core.config import get_settings
+from app.database import Base
+from app.email.outbox import (
+    OutboxWorker,
+    QueuedEmail,
+    enqueue_email,
+    enqueue_emails,
+    message_id,
+    retry_delay,
+)
+from app.email.sender import EmailSender
+from app.models import OutboundEmail, OutboxStatus
+
+RECIPIENT = "reader@example.com"
+KEY = "welcome:1"
+
+
+class Mailbox:
+    """aiosmtpd handler that defers the first ``failures[address]`` RCPTs."""
+
+    def __init__(self) -> None:
+        self.messages: list[Message] = []
+        self.failures: dict[str, int] = {}
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.failures.get(address, 0) > 0:
+            self.failures[address] -= 1
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def mailbox():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Mailbox()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=port,
+        auth_require_tls=False,
+        authenticator=lambda *args: AuthResult(success=True),
+    )
+    controller.start()
+    try:
+        yield handler, port
+    finally:
+        controller.stop()
+
+
+def run_with_outbox(tmp_path: Path, port: int, scenario) -> None:
+    """Run ``scenario(session_factory, sender)`` on a fresh outbox database."""
+    settings = get_settings().copy(
+        update={
+            "mail_smtp_host": "127.0.0.1",
+            "mail_smtp_port": port,
+            "mail_use_tls": False,
+            "mail_username": "worker",
+            "mail_password": "secret",
+        }
+    )
+
+    async def main() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.sqlite'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sender = EmailSender(settings)
+        try:
+            await scenario(async_sessionmaker(engine, expire_on_commit=False), sender)
+        finally:
+            await sender.pool.close()
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+async def queue(session_factory: async_sessionmaker[AsyncSession], key: str = KEY) -> None:
+    async with session_factory() as session:
+        assert await enqueue_email(session, RECIPIENT, "Welcome", "<p>Hi</p>", idempotency_key=key)
+        await session.commit()
+
+
+async def load(session_factory: async_sessionmaker[AsyncSession], key: str = KEY) -> OutboundEmail:
+    async with session_factory() as session:
+        return await session.scalar(select(OutboundEmail).where(OutboundEmail.idempotency_key == key))
+
+
+async def make_due(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """Skip the backoff or lease by moving every row's next attempt into the past."""
+    async with session_factory() as session:
+        await session.execute(
+            update(OutboundEmail).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await session.commit()
+
+
+def test_idempotency_key_queues_once(tmp_path, mailbox):
+    _, port = mailbox
+
+    async def scenario(session_factory, sender):
+        async with session_factory() as session:
+            assert await enqueue_email(session, RECIPIENT, "Welcome", "<p>Hi</p>", idempotency_key=KEY)
+            await session.commit()
+        async with session_factory() as session:
+            assert not await enqueue_email(session, RECIPIENT, "Welcome", "<p>Hi</p>", idempotency_key=KEY)
+            queued = await enqueue_emails(
+                session,
+                [
+                    QueuedEmail(RECIPIENT, "A", "<p>A</p>", idempotency_key=KEY),
+                    QueuedEmail(RECIPIENT, "B", "<p>B</p>", idempotency_key="b"),
+                    QueuedEmail(RECIPIENT, "B", "<p>B</p>", idempotency_key="b"),
+                ],
+            )
+            await session.commit()
+            assert queued == {"b"}
+            rows = (await session.scalars(select(OutboundEmail.idempotency_key))).all()
+        assert sorted(rows) == ["b", KEY]
+
+    run_with_outbox(tmp_path, port, scenario)
+
+
+def test_deferred_recipient_is_retried_with_backoff(tmp_path, mailbox):
+    handler, port = mailbox
+    handler.failures[RECIPIENT] = 1
+
+    async def scenario(session_factory, sender):
+        await queue(session_factory)
+        worker = OutboxWorker(session_factory, sender)
+
+        started_at = datetime.utcnow()
+        assert await worker.run_once() == 1
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.PENDING
+        assert row.attempts == 1
+        assert "451" in row.last_error
+        base = get_settings().outbox_backoff_base_seconds
+        delay = (row.next_attempt_at - started_at).total_seconds()
+        assert base * 0.5 - 1 <= delay <= base + 1
+        # Not due again until the backoff has passed.
+        assert await worker.run_once() == 0
+
+        await make_due(session_factory)
+        assert await worker.run_once() == 1
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.SENT
+        assert row.attempts == 1
+        assert row.last_error is None
+
+    run_with_outbox(tmp_path, port, scenario)
+    assert len(handler.messages) == 1
+    message = handler.messages[0]
+    assert message["To"] == RECIPIENT
+    # Retries of one outbox row share a Message-ID so receivers can drop duplicates.
+    assert message["Message-ID"] == message_id(KEY)
+
+
+def test_gives_up_after_max_attempts(tmp_path, mailbox):
+    handler, port = mailbox
+    handler.failures[RECIPIENT] = 10
+
+    async def scenario(session_factory, sender):
+        await queue(session_factory)
+        worker = OutboxWorker(session_factory, sender, max_attempts=2)
+        assert await worker.run_once() == 1
+        await make_due(session_factory)
+        assert await worker.run_once() == 1
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.FAILED
+        assert row.attempts == 2
+        await make_due(session_factory)
+        assert await worker.run_once() == 0
+
+    run_with_outbox(tmp_path, port, scenario)
+    assert handler.messages == []
+
+
+def test_expired_lease_is_fenced(tmp_path, mailbox):
+    handler, port = mailbox
+
+    async def scenario(session_factory, sender):
+        await queue(session_factory)
+        # A worker claims the row and then hangs past its lease.
+        stale = OutboxWorker(session_factory, sender)
+        stale_claim, stale_messages = await stale._claim()
+        assert [message.idempotency_key for message in stale_messages] == [KEY]
+        await make_due(session_factory)
+
+        assert await OutboxWorker(session_factory, sender).run_once() == 1
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.SENT
+        # Re-leasing an expired claim counts as an attempt.
+        assert row.attempts == 1
+
+        # The stale worker's late failure must not overwrite the delivery.
+        await stale._record(stale_claim, stale_messages, ["timed out"])
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.SENT
+        assert row.last_error is None
+
+    run_with_outbox(tmp_path, port, scenario)
+    assert len(handler.messages) == 1
+
+
+def test_expired_lease_counts_towards_max_attempts(tmp_path, mailbox):
+    handler, port = mailbox
+
+    async def scenario(session_factory, sender):
+        await queue(session_factory)
+        worker = OutboxWorker(session_factory, sender, max_attempts=1)
+        await worker._claim()
+        await make_due(session_factory)
+        assert await worker.run_once() == 0
+        row = await load(session_factory)
+        assert row.status == OutboxStatus.FAILED
+        assert row.last_error == "Lease expired during delivery"
+
+    run_with_outbox(tmp_path, port, scenario)
+    assert handler.messages == []
+
+
+def test_retry_delay_grows_exponentially_up_to_the_cap():
+    settings = get_settings()
+    for attempts in range(1, 16):
+        ceiling = min(
+            settings.outbox_backoff_max_seconds,
+            settings.outbox_backoff_base_seconds * 2 ** (attempts - 1),
+        )
+        assert ceiling * 0.5 <= retry_delay(attempts) <= ceiling
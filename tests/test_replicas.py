@@ -0,0 +1,117 @@
+"""Read routing between a primary and replicas on separate SQLite files."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.future import select
+
+from app import database
+from app.core.config import get_settings
+from app.database import Base, PrimarySession, ReplicaSet, build_engine, get_read_session
+from app.models import User
+
+
+async def seed(target: AsyncEngine, full_name: str) -> None:
+    """Create the schema and one user whose name says which database it is in."""
+    async with target.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(target)() as session:
+        session.add(User(id=1, email="reader@example.com", hashed_password="x", full_name=full_name))
+        await session.commit()
+
+
+def run_with_databases(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, scenario, strategy="round_robin"):
+    """Run ``scenario(primary, replicas)`` with ``app.database`` pointed at files under ``tmp_path``."""
+    settings = get_settings()
+
+    async def main() -> None:
+        primary = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.sqlite'}", settings)
+        replica_set = ReplicaSet(
+            [
+                build_engine(f"sqlite+aiosqlite:///{tmp_path / f'replica{position}.sqlite'}", settings)
+                for position in range(2)
+            ],
+            strategy,
+        )
+        monkeypatch.setattr(database, "engine", primary)
+        monkeypatch.setattr(database, "replicas", replica_set)
+        try:
+            await seed(primary, "primary")
+            for position, replica in enumerate(replica_set.engines):
+                await seed(replica, f"replica{position}")
+            await scenario(primary, replica_set)
+        finally:
+            for target in (primary, *replica_set.engines):
+                await target.dispose()
+
+    asyncio.run(main())
+
+
+def primary_factory(primary: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(primary, sync_session_class=PrimarySession, expire_on_commit=False)
+
+
+async def read_name(session) -> str:
+    return (await session.scalars(select(User.full_name).where(User.id == 1))).one()
+
+
+def test_reads_go_to_a_replica(tmp_path, monkeypatch):
+    async def scenario(primary, replica_set):
+        names = []
+        for _ in range(2):
+            request = SimpleNamespace(state=SimpleNamespace())
+            async with primary_factory(primary)(info={"request_state": request.state}) as primary_session:
+                reads = get_read_session(request, primary_session)
+                names.append(await read_name(await reads.__anext__()))
+                await reads.aclose()
+        # Round-robin spreads consecutive requests over both replicas.
+        assert names == ["replica0", "replica1"]
+
+    run_with_databases(tmp_path, monkeypatch, scenario)
+
+
+def test_reads_stay_on_the_primary_after_a_commit(tmp_path, monkeypatch):
+    async def scenario(primary, replica_set):
+        request = SimpleNamespace(state=SimpleNamespace())
+        async with primary_factory(primary)(info={"request_state": request.state}) as primary_session:
+            reads = get_read_session(request, primary_session)
+            read_session = await reads.__anext__()
+            user = await read_session.get(User, 1)
+            assert user.full_name == "replica0"
+
+            written = await primary_session.get(User, 1)
+            written.full_name = "renamed"
+            await primary_session.commit()
+            assert request.state.db_primary_pinned
+
+            # The replica has not caught up, so the rest of the request reads
+            # the primary, refreshing objects already in the identity map.
+            assert await read_name(read_session) == "renamed"
+            assert (await read_session.scalars(select(User))).one() is user
+            assert user.full_name == "renamed"
+            await reads.aclose()
+
+        # A new request goes back to the replicas.
+        request = SimpleNamespace(state=SimpleNamespace())
+        async with primary_factory(primary)(info={"request_state": request.state}) as primary_session:
+            reads = get_read_session(request, primary_session)
+            assert (await read_name(await reads.__anext__())).startswith("replica")
+            await reads.aclose()
+
+    run_with_databases(tmp_path, monkeypatch, scenario)
+
+
+def test_least_connections_picks_the_idle_replica(tmp_path, monkeypatch):
+    async def scenario(primary, replica_set):
+        busy, idle = replica_set.engines
+        async with busy.connect():
+            assert replica_set.choose() is idle
+            assert replica_set.choose() is idle
+        async with idle.connect():
+            assert replica_set.choose() is busy
+
+    run_with_databases(tmp_path, monkeypatch, scenario, strategy="least_connections")